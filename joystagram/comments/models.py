@@ -1,7 +1,7 @@
 from django.db import models
-from django.db.models import F
 from model_utils.models import TimeStampedModel
 
+from core.counters import incr_counter
 from posts.models import Post
 
 
@@ -13,13 +13,15 @@ class Comment(TimeStampedModel):
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         """Post의 댓글 갯수 + 1"""
+        adding = self._state.adding
         super().save(force_insert, force_update, using, update_fields)
-        Post.objects.filter(id=self.post.id).update(comments_count=F('comments_count') + 1)
+        if adding:
+            incr_counter(Post, self.post_id, 'comments_count', 1)
 
     def delete(self, using=None, keep_parents=False):
         """Post의 댓글 갯수 - 1"""
         result = super().delete(using, keep_parents)
-        Post.objects.filter(id=self.post.id).update(comments_count=F('comments_count') - 1)
+        incr_counter(Post, self.post_id, 'comments_count', -1)
         return result
 
 
@@ -30,13 +32,15 @@ class ReComment(TimeStampedModel):
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         """Post, Comment 의 댓글 갯수 + 1"""
+        adding = self._state.adding
         super().save(force_insert, force_update, using, update_fields)
-        Post.objects.filter(id=self.comment.post.id).update(comments_count=F('comments_count') + 1)
-        Comment.objects.filter(id=self.comment.id).update(recomments_count=F('recomments_count') + 1)
+        if adding:
+            incr_counter(Post, self.comment.post_id, 'comments_count', 1)
+            incr_counter(Comment, self.comment_id, 'recomments_count', 1)
 
     def delete(self, using=None, keep_parents=False):
         """Post, Comment 의 댓글 갯수 - 1"""
         result = super().delete(using, keep_parents)
-        Post.objects.filter(id=self.comment.post.id).update(comments_count=F('comments_count') - 1)
-        Comment.objects.filter(id=self.comment.id).update(recomments_count=F('recomments_count') - 1)
+        incr_counter(Post, self.comment.post_id, 'comments_count', -1)
+        incr_counter(Comment, self.comment_id, 'recomments_count', -1)
         return result
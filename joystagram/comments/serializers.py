@@ -1,12 +1,14 @@
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound
 from comments.models import Comment, ReComment
+from core.counters import get_counters
 from posts.models import Post
 from users.serializers import SimpleProfileSerializer
 
 
 class CommentSerializer(serializers.ModelSerializer):
     owner = SimpleProfileSerializer(read_only=True)
+    recomments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
@@ -21,15 +23,26 @@ class CommentSerializer(serializers.ModelSerializer):
                 raise NotFound('Post is not valid')
         return attrs
 
+    def get_recomments_count(self, obj):
+        """view 에서 페이지 단위로 조회한 대댓글 갯수 (DB 에 반영 안 된 증감값 포함)"""
+        counter_dict = getattr(self.context['view'], 'counter_dict', None)
+        if counter_dict is None:
+            counter_dict = get_counters([obj], ('recomments_count',))
+        return counter_dict[obj.id]['recomments_count']
+
 
 class CommentUpdateSerializer(serializers.ModelSerializer):
     owner = SimpleProfileSerializer(read_only=True)
+    recomments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = ('id', 'content', 'owner', 'recomments', 'recomments_count')
         read_only_fields = ('owner', 'recomments', 'recomments_count')
 
+    def get_recomments_count(self, obj):
+        return get_counters([obj], ('recomments_count',))[obj.id]['recomments_count']
+
 
 class ReCommentSerializer(serializers.ModelSerializer):
     owner = SimpleProfileSerializer(read_only=True)
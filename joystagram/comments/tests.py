@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -55,6 +56,7 @@ class CommentListTestCase(APITestCase):
     """댓글 리스트 테스트"""
 
     def setUp(self) -> None:
+        cache.clear()
         self.user = baker.make('users.User')
         baker.make('users.Profile', user=self.user)
         self.post = baker.make('posts.Post')
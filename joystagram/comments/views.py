@@ -1,6 +1,7 @@
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 from comments.models import Comment, ReComment
+from core.counters import get_counters
 from core.permissions import IsOwnerOrAuthenticatedReadOnly
 from comments.serializers import CommentSerializer, ReCommentSerializer, ReCommentUpdateSerializer, \
     CommentUpdateSerializer
@@ -24,6 +25,13 @@ class CommentCreateListViewSet(mixins.CreateModelMixin,
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user, post_id=self.kwargs.get('post_pk'))
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        # 대댓글 갯수 주입
+        self.counter_dict = get_counters(page, ('recomments_count',))
+        return page
+
 
 class CommentViewSet(mixins.UpdateModelMixin,
                      mixins.DestroyModelMixin,
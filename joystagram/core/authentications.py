@@ -1,17 +1,48 @@
+import pickle
+
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
 
+from core.caches import LRUCache
+
+# 토큰(user 포함) 캐시: 프로세스 로컬 LRU -> Redis -> DB
+# 로컬 캐시는 요청끼리 같은 객체를 나눠 쓰지 않도록 pickle 해서 저장
+local_token_cache = LRUCache(settings.AUTH_TOKEN_LOCAL_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_CACHE_TIMEOUT)
+
+
+def get_token_cache_key(key):
+    return f'auth_token:{key}'
+
+
+def invalidate_token(key):
+    """로그아웃, 비밀번호 변경, 비활성화 시 토큰 캐시 삭제 (다른 프로세스의 로컬 캐시는 timeout 후 만료)"""
+    local_token_cache.delete(key)
+    cache.delete(get_token_cache_key(key))
+
 
 class MyTokenAuthentication(TokenAuthentication):
     def authenticate_credentials(self, key):
-        model = self.get_model()
-        try:
-            token = model.objects.select_related('user').get(key=key)
-        except model.DoesNotExist:
-            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        data = local_token_cache.get(key)
+        if data is not None:
+            token = pickle.loads(data)
+        else:
+            token = cache.get(get_token_cache_key(key))
+            if token is None:
+                token = self.get_token(key)
+                cache.set(get_token_cache_key(key), token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+            local_token_cache.set(key, pickle.dumps(token))
 
         if not token.user.is_active:
             raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
 
         return token.user, token
+
+    def get_token(self, key):
+        model = self.get_model()
+        try:
+            return model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
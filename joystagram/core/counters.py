@@ -0,0 +1,158 @@
+"""
+카운터 버퍼 (write-behind)
+
+좋아요, 댓글 갯수 증감은 Redis 에 바로 INCRBY 하고
+flush_counters 커맨드가 주기적으로 모아서 DB 에 한 번에 반영
+조회할 때는 row 값 + 아직 반영 안 된 증감값
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Case, When, Value, IntegerField
+from django.db.models.functions import Greatest
+from django_redis import get_redis_connection
+
+# 증감값이 남아있는 카운터 ('{model label}:{pk}:{field}')
+DIRTY_KEY = 'counter:dirty'
+
+# flush 와 재계산(core.reconciliation) 이 동시에 돌지 않도록
+# (Redis 에서 꺼냈지만 아직 DB 에 없는 증감값이 양쪽 어디에도 안 보이는 순간이 없게)
+FLUSH_LOCK_KEY = 'counter:flush_lock'
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def get_redis():
+    return get_redis_connection('default')
+
+
+def flush_lock():
+    # 연장(hold_flush_lock)은 다른 스레드에서 하므로 token 을 스레드별로 두지 않음
+    return get_redis().lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT, thread_local=False)
+
+
+@contextmanager
+def hold_flush_lock():
+    """
+    flush_lock 을 잡고 끝날 때까지 FLUSH_LOCK_TIMEOUT / 3 마다 연장 (얼마나 걸릴지 모르는 재계산 청크)
+    프로세스가 죽으면 FLUSH_LOCK_TIMEOUT 안에 풀림
+    """
+    interval = FLUSH_LOCK_TIMEOUT / 3
+    with flush_lock() as lock:
+        stop = threading.Event()
+
+        def extend():
+            while not stop.wait(interval):
+                lock.extend(interval)
+
+        thread = threading.Thread(target=extend, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def get_member(model, pk, field):
+    return f'{model._meta.label_lower}:{pk}:{field}'
+
+
+def get_delta_key(member):
+    return f'counter:{member}'
+
+
+def incr_counter(model, pk, field, delta=1):
+    """카운터 증감 (DB 는 flush 때 반영)"""
+    member = get_member(model, pk, field)
+    with get_redis().pipeline(transaction=False) as pipe:
+        pipe.incrby(get_delta_key(member), delta)
+        pipe.sadd(DIRTY_KEY, member)
+        pipe.execute()
+
+
+def get_deltas(model, pks, field):
+    """아직 DB 에 반영 안 된 증감값 {pk: delta}"""
+    pks = list(pks)
+    if not pks:
+        return {}
+    keys = [get_delta_key(get_member(model, pk, field)) for pk in pks]
+    return {pk: int(delta or 0) for pk, delta in zip(pks, get_redis().mget(keys))}
+
+
+def get_counters(objs, fields):
+    """
+    페이지 객체들의 카운터를 MGET 한 번으로 조회: row 값 + 증감값
+    {pk: {field: count}}
+    """
+    objs = list(objs)
+    if not objs:
+        return {}
+    keys = [get_delta_key(get_member(obj, obj.pk, field)) for obj in objs for field in fields]
+    deltas = iter(get_redis().mget(keys))
+
+    counters = {}
+    for obj in objs:
+        for field in fields:
+            counters.setdefault(obj.pk, {})[field] = getattr(obj, field) + int(next(deltas) or 0)
+    return counters
+
+
+def bulk_increment(model, field, deltas):
+    """{pk: delta} 를 UPDATE 한 번으로 반영 (0 미만으로는 내려가지 않음)"""
+    if not deltas:
+        return 0
+    whens = [When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()]
+    increment = Case(*whens, default=Value(0), output_field=IntegerField())
+    return model.objects.filter(pk__in=list(deltas)). \
+        invalidated_update(**{field: Greatest(F(field) + increment, Value(0), output_field=IntegerField())})
+
+
+def flush(batch_size=1000):
+    """쌓인 증감값을 batch_size 개씩 꺼내 모델, 필드별 UPDATE 한 번으로 반영, 반영한 카운터 수 리턴"""
+    redis = get_redis()
+    flushed = 0
+    while True:
+        with flush_lock():
+            flushed_batch = flush_batch(redis, batch_size)
+        if not flushed_batch:
+            return flushed
+        flushed += flushed_batch
+
+
+def flush_batch(redis, batch_size):
+    """증감값 batch_size 개 반영, 반영한 카운터 수 리턴"""
+    members = [member.decode() for member in redis.spop(DIRTY_KEY, batch_size)]
+    if not members:
+        return 0
+
+    # 증감값 꺼내면서 0으로 (GET, DEL 을 MULTI 로 묶어 그 사이 INCRBY 유실 방지)
+    with redis.pipeline() as pipe:
+        for member in members:
+            pipe.get(get_delta_key(member))
+            pipe.delete(get_delta_key(member))
+        values = pipe.execute()[::2]
+
+    groups = defaultdict(dict)
+    for member, delta in zip(members, values):
+        label, pk, field = member.split(':')
+        if delta and int(delta):
+            groups[(label, field)][int(pk)] = int(delta)
+
+    try:
+        with transaction.atomic():
+            for (label, field), deltas in groups.items():
+                bulk_increment(apps.get_model(label), field, deltas)
+    except Exception:
+        # 반영 실패 시 증감값 되돌려 놓기
+        with redis.pipeline(transaction=False) as pipe:
+            for (label, field), deltas in groups.items():
+                for pk, delta in deltas.items():
+                    member = f'{label}:{pk}:{field}'
+                    pipe.incrby(get_delta_key(member), delta)
+                    pipe.sadd(DIRTY_KEY, member)
+            pipe.execute()
+        raise
+    return len(members)
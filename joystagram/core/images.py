@@ -0,0 +1,293 @@
+"""
+이미지 변형(variant) 생성
+
+업로드된 원본으로 IMAGE_VARIANTS 크기별 IMAGE_VARIANT_FORMATS 포맷 이미지를 만들어 원본 옆에 저장
+    post_img/1/a.png -> post_img/1/a__thumbnail.webp, post_img/1/a__feed.jpeg ...
+Pillow 작업은 요청 밖의 프로세스 풀에서 (IMAGE_WORKERS 가 0 이면 바로 실행, 테스트용)
+다 만들어지면 모델의 variants_source 에 원본 이름을 저장하고, 이름이 같을 때만 변형 URL 을 내려준다
+같은 내용의 파일(core.media)은 MediaFile.variants_state 로 한 번만 만들고, 다시 올린 row 는 결과만 복사
+만드는 중(rendering)인 채로 IMAGE_VARIANTS_CLAIM_TIMEOUT 이 지나면 작업이 죽은 것으로 보고 다음 업로드가 다시 만듦
+
+업로드는 임시 파일로 받고(FILE_UPLOAD_HANDLERS) 요청 안에서는 헤더(포맷, 크기)만 검사 (HeaderImageField)
+전체 디코딩, 검증은 변형 생성 작업에서 (깨진 이미지면 가리키는 row 들의 img 를 비움)
+
+가로, 세로, 바이트 크기는 업로드할 때 헤더에서 (core.media.ContentHashImageField)
+흐린 미리보기(placeholder)는 변형 생성 작업에서 만들어 모델에 저장, API, admin 은 파일을 읽지 않음 (ImageMetaField)
+"""
+import base64
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from core.models import MediaFile
+
+logger = logging.getLogger(__name__)
+
+# placeholder 최대 가로, 세로 크기
+PLACEHOLDER_SIZE = 16
+
+# Pillow save 옵션
+FORMAT_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# 변형 이미지가 준비됨 (sender: 모델, pk)
+variants_ready = Signal()
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_variant_name(name, variant, image_format):
+    root, _ = os.path.splitext(name)
+    return f'{root}__{variant}.{image_format}'
+
+
+def convert(image, image_format):
+    """jpeg 는 RGB, webp 는 투명도 유지 (RGB, RGBA)"""
+    if image_format == 'jpeg':
+        return image.convert('RGB')
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA')
+    return image
+
+
+class InvalidImage(Exception):
+    """헤더 검사는 통과했지만 전체 디코딩에 실패한 원본"""
+
+
+def open_image(name):
+    """storage 의 원본을 전체 디코딩 (깨진 이미지는 load 에서 실패)"""
+    with default_storage.open(name) as file:
+        try:
+            image = Image.open(file)
+            image.load()
+        except Exception as e:
+            raise InvalidImage(name) from e
+    return image
+
+
+def render_placeholder(image):
+    """흐린 미리보기 data URI (PLACEHOLDER_SIZE 크기 webp)"""
+    image = image.copy()
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    convert(image, 'webp').save(buffer, format='WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def read_meta(name):
+    """기존 파일의 가로, 세로, 바이트 크기, placeholder (fill_image_meta 커맨드)"""
+    image = open_image(name)
+    # 가로, 세로는 업로드할 때처럼 헤더 값 (EXIF 회전 전)
+    return {
+        'img_width': image.width,
+        'img_height': image.height,
+        'img_size': default_storage.size(name),
+        'img_placeholder': render_placeholder(ImageOps.exif_transpose(image)),
+    }
+
+
+def render_variants(name):
+    """원본 name 으로 모든 변형 이미지를 만들어 저장, placeholder 리턴 (프로세스 풀에서 실행)"""
+    original = ImageOps.exif_transpose(open_image(name))
+
+    for variant, size in settings.IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            buffer = io.BytesIO()
+            convert(image, image_format).save(buffer, **FORMAT_OPTIONS[image_format])
+            variant_name = get_variant_name(name, variant, image_format)
+            default_storage.delete(variant_name)
+            default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+    return render_placeholder(original)
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+def mark_ready(model, name, placeholder):
+    """원본 name 의 변형 준비 완료 표시, name 을 가리키는 row 들에 variants_source, placeholder 저장"""
+    MediaFile.objects.filter(name=name). \
+        update(variants_state=MediaFile.VARIANTS_READY, variants_claimed=None, placeholder=placeholder)
+    pks = list(model.objects.filter(img=name).exclude(variants_source=name).values_list('pk', flat=True))
+    if pks:
+        # 캐시(cacheops)된 row 도 무효화
+        model.objects.filter(pk__in=pks, img=name). \
+            invalidated_update(variants_source=name, img_placeholder=placeholder)
+    for pk in pks:
+        variants_ready.send(sender=model, pk=pk)
+
+
+def mark_failed(name):
+    """다음 업로드가 다시 만들 수 있도록"""
+    MediaFile.objects.filter(name=name, variants_state=MediaFile.VARIANTS_RENDERING). \
+        update(variants_state=MediaFile.VARIANTS_NONE, variants_claimed=None)
+
+
+def mark_invalid(model, name):
+    """깨진 원본을 내려주지 않도록 가리키는 row 들의 img 를 비움 (참조 수 - 1, 아무도 없으면 파일 삭제)"""
+    mark_failed(name)
+    for instance in model.objects.filter(img=name):
+        instance.img = ''
+        instance.img_width = instance.img_height = instance.img_size = None
+        instance.img_placeholder = ''
+        instance.save(update_fields=['img', 'img_width', 'img_height', 'img_size', 'img_placeholder'])
+
+
+def claim(name):
+    """
+    같은 내용(content hash)의 파일은 변형을 한 번만 만든다
+    이미 만들어졌으면 placeholder, 이번에 만들 차례면 None, 다른 작업이 만드는 중이면 False
+    (만드는 중이면 그 작업의 mark_ready 가 이 row 에도 저장)
+    만드는 중인 채로 IMAGE_VARIANTS_CLAIM_TIMEOUT 이 지났으면 죽은 작업으로 보고 이번에 다시 만듦
+    """
+    now = timezone.now()
+    stale = Q(variants_claimed__lt=now - timedelta(seconds=settings.IMAGE_VARIANTS_CLAIM_TIMEOUT)) | \
+        Q(variants_claimed__isnull=True)
+    claimable = Q(variants_state=MediaFile.VARIANTS_NONE) | Q(stale, variants_state=MediaFile.VARIANTS_RENDERING)
+    if MediaFile.objects.filter(claimable, name=name). \
+            update(variants_state=MediaFile.VARIANTS_RENDERING, variants_claimed=now):
+        return None
+    state = MediaFile.objects.filter(name=name).values_list('variants_state', 'placeholder').first()
+    if state is None:
+        # 참조 row 가 없는 파일 (fill_image_meta 등)
+        return None
+    variants_state, placeholder = state
+    if variants_state == MediaFile.VARIANTS_READY:
+        return placeholder
+    return False
+
+
+def generate_variants(instances):
+    """instances(img, variants_source 필드를 가진 모델)의 변형 이미지 생성 예약"""
+    for instance in instances:
+        if not instance.img or instance.variants_source == instance.img.name:
+            continue
+        model, name = type(instance), instance.img.name
+        placeholder = claim(name)
+        if placeholder is False:
+            continue
+        if placeholder is not None:
+            mark_ready(model, name, placeholder)
+            continue
+        if settings.IMAGE_WORKERS <= 0:
+            try:
+                placeholder = render_variants(name)
+            except InvalidImage:
+                logger.warning('invalid image: %s', name, exc_info=True)
+                mark_invalid(model, name)
+                continue
+            except Exception:
+                # 변형이 없어도 원본으로 동작하므로 요청은 실패시키지 않음
+                logger.exception('image variants failed: %s', name)
+                mark_failed(name)
+                continue
+            mark_ready(model, name, placeholder)
+            continue
+
+        def done(future, model=model, name=name):
+            error = future.exception()
+            if isinstance(error, InvalidImage):
+                logger.warning('invalid image: %s', name, exc_info=error)
+                mark_invalid(model, name)
+            elif error is not None:
+                logger.error('image variants failed: %s', name, exc_info=error)
+                mark_failed(name)
+            else:
+                mark_ready(model, name, future.result())
+
+        get_executor().submit(render_variants, name).add_done_callback(done)
+
+
+class HeaderImageField(serializers.FileField):
+    """
+    이미지 헤더만 읽어서 검사하는 업로드 필드
+    serializers.ImageField 와 달리 요청 안에서 전체를 디코딩(verify)하지 않음
+    """
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image. The file you uploaded was either not an image or a corrupted image.',
+        'too_large': 'Ensure this file size is not greater than {max_size} bytes.',
+        'too_many_pixels': 'Ensure this image is not greater than {max_pixels} pixels.',
+    }
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        if file.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_UPLOAD_MAX_SIZE)
+        try:
+            # Image.open 은 헤더만 읽음 (픽셀 데이터는 load 할 때)
+            image = Image.open(file)
+            image_format, (width, height) = image.format, image.size
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(0)
+        if image_format not in settings.IMAGE_UPLOAD_FORMATS:
+            self.fail('invalid_image')
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.fail('too_many_pixels', max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS)
+        return file
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    {format: {variant: url}}, 변형이 아직 없으면 None (원본 img 사용)
+    source 는 img, variants_source 필드를 가진 모델 (기본: 자기 자신)
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', '*')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        if not instance.img or instance.variants_source != instance.img.name:
+            return None
+        request = self.context.get('request')
+        variants = {}
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            variants[image_format] = {}
+            for variant in settings.IMAGE_VARIANTS:
+                url = default_storage.url(get_variant_name(instance.img.name, variant, image_format))
+                variants[image_format][variant] = request.build_absolute_uri(url) if request else url
+        return variants
+
+
+class ImageMetaField(serializers.Field):
+    """
+    {width, height, size, placeholder}, 모델에 저장된 값 (파일을 읽지 않음)
+    source 는 img_width, img_height, img_size, img_placeholder 필드를 가진 모델 (기본: 자기 자신)
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', '*')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return {
+            'width': instance.img_width,
+            'height': instance.img_height,
+            'size': instance.img_size,
+            'placeholder': instance.img_placeholder or None,
+        }
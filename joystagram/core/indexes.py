@@ -0,0 +1,143 @@
+from django_redis import get_redis_connection
+
+# 인덱스가 처음부터 전부를 담고 있다는 표시 (score 0, 실제 id 는 1부터)
+SENTINEL = 0
+
+# 이미 있는 키에만 id 추가 후 max_length 로 자르기
+# (없는 키에 추가하면 과거가 빠진 인덱스가 생기므로 키가 없으면 읽을 때 새로 만든다)
+PUSH_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[1], ARGV[1])
+        redis.call('ZREMRANGEBYRANK', key, 0, -tonumber(ARGV[2]) - 1)
+    end
+end
+"""
+
+
+class IDIndex:
+    """
+    Redis sorted set 에 id 를 (member, score 모두 id) 최신 max_length 개까지 저장하는 인덱스
+    IDPagination 의 커서 범위(window) 만큼만 읽는다
+    """
+    chunk_size = 500
+    # 인덱스를 만든 뒤 다시 확인하는 최신 id 갯수
+    recheck_size = 100
+
+    def __init__(self, prefix, max_length, timeout):
+        self.prefix = prefix
+        self.max_length = max_length
+        self.timeout = timeout
+        self._push_script = None
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def get_key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def read(self, pk, window, loader):
+        """
+        window(position, reverse, count) 범위의 id 리스트
+        키가 없으면 loader(max_length) 로 최신 id 들(내림차순)을 받아 새로 만든다
+        인덱스가 범위를 다 담지 못하면(잘려나간 과거) None
+        """
+        position, reverse, count = window
+        key = self.get_key(pk)
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.zscore(key, SENTINEL)
+            pipe.zrange(key, 0, 0)
+            if reverse:
+                low = f'({position}' if position is not None else f'({SENTINEL}'
+                pipe.zrangebyscore(key, low, '+inf', start=0, num=count)
+            else:
+                high = f'({position}' if position is not None else '+inf'
+                pipe.zrevrangebyscore(key, high, f'({SENTINEL}', start=0, num=count)
+            pipe.expire(key, self.timeout)
+            exists, sentinel, oldest, members, _ = pipe.execute()
+
+        if exists:
+            ids = [int(member) for member in members]
+            complete = sentinel is not None
+            oldest = int(oldest[0]) if oldest else None
+        else:
+            all_ids = list(loader(self.max_length))
+            complete = self.build(pk, all_ids)
+            # 읽는 동안 추가된 id 는 키가 없어 push 가 건너뛰었으므로 만든 뒤 다시 확인
+            newer = [member for member in loader(self.recheck_size) if not all_ids or member > all_ids[0]]
+            if newer:
+                self.add(pk, newer)
+                all_ids = newer + all_ids
+                complete = complete and len(all_ids) < self.max_length
+            ids = self.slice(all_ids, window)
+            oldest = all_ids[-1] if all_ids else None
+
+        if complete:
+            return ids
+        if reverse:
+            if position is not None and (oldest is None or position < oldest):
+                return None
+        elif len(ids) < count:
+            return None
+        return ids
+
+    def build(self, pk, ids):
+        """내림차순 id 리스트로 인덱스 새로 생성, 전부를 담았는지 여부 리턴"""
+        key = self.get_key(pk)
+        ids = ids[:self.max_length]
+        complete = len(ids) < self.max_length
+        with self.redis.pipeline() as pipe:
+            pipe.delete(key)
+            for i in range(0, len(ids), self.chunk_size):
+                pipe.zadd(key, {member: member for member in ids[i:i + self.chunk_size]})
+            if complete:
+                pipe.zadd(key, {SENTINEL: SENTINEL})
+            pipe.expire(key, self.timeout)
+            pipe.execute()
+        return complete
+
+    def add(self, pk, members):
+        """만들어진 인덱스 하나에 id 들 추가 후 max_length 로 자르기"""
+        key = self.get_key(pk)
+        with self.redis.pipeline() as pipe:
+            pipe.zadd(key, {member: member for member in members})
+            pipe.zremrangebyrank(key, 0, -self.max_length - 1)
+            pipe.execute()
+
+    def push(self, pks, member):
+        """이미 만들어진 인덱스들에만 id 추가"""
+        if self._push_script is None:
+            self._push_script = self.redis.register_script(PUSH_SCRIPT)
+        keys = []
+        for pk in pks:
+            keys.append(self.get_key(pk))
+            if len(keys) >= self.chunk_size:
+                self._push_script(keys=keys, args=[member, self.max_length])
+                keys = []
+        if keys:
+            self._push_script(keys=keys, args=[member, self.max_length])
+
+    def remove(self, pks, member):
+        pipe = self.redis.pipeline(transaction=False)
+        for i, pk in enumerate(pks, 1):
+            pipe.zrem(self.get_key(pk), member)
+            if i % self.chunk_size == 0:
+                pipe.execute()
+        pipe.execute()
+
+    def discard(self, pk, members):
+        """인덱스 하나에서 id 들 제거 (읽을 때 발견한 삭제된 id)"""
+        self.redis.zrem(self.get_key(pk), *members)
+
+    def delete(self, pk):
+        self.redis.delete(self.get_key(pk))
+
+    @staticmethod
+    def slice(ids, window):
+        """내림차순 id 리스트에서 window 범위만"""
+        position, reverse, count = window
+        if reverse:
+            return sorted(i for i in ids if position is None or i > position)[:count]
+        return [i for i in ids if position is None or i < position][:count]
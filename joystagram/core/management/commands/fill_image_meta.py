@@ -0,0 +1,28 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+
+from core import images
+
+IMAGE_MODELS = ('posts.Photo', 'users.Profile', 'story.Story')
+
+
+class Command(BaseCommand):
+    help = '가로, 세로, 크기, placeholder 가 비어 있는 기존 이미지 채우기 (파일을 한 번씩 읽음)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        for label in IMAGE_MODELS:
+            model = apps.get_model(label)
+            queryset = model.objects.filter(img_width__isnull=True).exclude(img='').values_list('pk', 'img')
+            filled = 0
+            for pk, name in queryset.iterator(chunk_size=options['chunk_size']):
+                try:
+                    meta = images.read_meta(name)
+                except Exception as e:
+                    self.stderr.write(f'{label} {pk} {name}: {e}')
+                    continue
+                # 그 사이 이미지가 바뀌었으면 건너뜀, 캐시(cacheops)된 row 도 무효화
+                filled += model.objects.filter(pk=pk, img=name).invalidated_update(**meta)
+            self.stdout.write(f'{label}: filled {filled}')
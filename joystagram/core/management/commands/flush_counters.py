@@ -0,0 +1,23 @@
+import time
+
+from django.core.management import BaseCommand
+
+from core import counters
+
+
+class Command(BaseCommand):
+    help = 'Redis 에 쌓인 좋아요, 댓글 갯수 증감값을 DB 에 반영'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=float, default=0,
+                            help='0 보다 크면 interval 초마다 계속 반영')
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = counters.flush(options['batch_size'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f'flushed {flushed} counters')
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from core.reconciliation import COUNTER_SPECS, COUNTER_SPEC_DICT, reconcile
+
+
+class Command(BaseCommand):
+    help = '비정규화 카운터(좋아요, 댓글, 팔로우 갯수 등)를 실제 row 수로 재계산'
+
+    def add_arguments(self, parser):
+        parser.add_argument('counters', nargs='*',
+                            help=f'재계산할 카운터 {list(COUNTER_SPEC_DICT)} (기본: 전부)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--start-id', type=int)
+        parser.add_argument('--end-id', type=int)
+        parser.add_argument('--dry-run', action='store_true', help='고치지 않고 차이만 출력')
+        parser.add_argument('--resume', action='store_true', help='마지막 체크포인트부터 이어서')
+        parser.add_argument('--sleep', type=float, default=0, help='청크 사이 대기 시간(초)')
+
+    def handle(self, *args, **options):
+        invalid = set(options['counters']) - set(COUNTER_SPEC_DICT)
+        if invalid:
+            raise CommandError(f'unknown counters: {", ".join(sorted(invalid))}')
+        specs = [COUNTER_SPEC_DICT[name] for name in options['counters']] or COUNTER_SPECS
+        for spec in specs:
+            fixed = 0
+            chunks = reconcile(spec,
+                               chunk_size=options['chunk_size'],
+                               start=options['start_id'],
+                               end=options['end_id'],
+                               dry_run=options['dry_run'],
+                               resume=options['resume'])
+            for start, end, diffs in chunks:
+                fixed += len(diffs)
+                if options['dry_run'] or options['verbosity'] > 1:
+                    for pk, stored, target in diffs:
+                        self.stdout.write(f'{spec.name} {pk}: {stored} -> {target}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{spec.name} [{start}, {end}) done')
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+            action = 'to fix' if options['dry_run'] else 'fixed'
+            self.stdout.write(self.style.SUCCESS(f'{spec.name}: {fixed} {action}'))
@@ -0,0 +1,176 @@
+"""
+content hash 미디어 저장
+
+업로드 파일을 읽으면서 sha256 을 계산해 {upload_to}/{hash 앞 2자리}/{hash}{확장자} 로 한 번만 저장
+같은 내용을 다시 올리면 저장 없이 이름만 가리킨다
+MediaFile.ref_count 로 파일을 가리키는 row 수를 세고 0 이 되면 커밋 후 파일(변형 이미지 포함)을 지운다
+업로드는 참조 수를 먼저 올린 뒤 파일이 있는지 보므로 삭제와 겹쳐도 없는 파일을 가리키지 않는다
+"""
+import hashlib
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.fields.files import FieldFile, ImageField, ImageFieldFile
+from django.db.models.signals import post_init, post_save, post_delete
+
+from core import images
+from core.counters import bulk_increment
+from core.models import MediaFile
+
+
+class ContentHashFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        """
+        참조 수를 먼저 + 1 (삭제 중인 파일이면 row lock 으로 삭제가 끝나기를 기다림)
+        그 뒤 같은 내용의 파일이 이미 있으면 저장하지 않음
+        """
+        name = self.field.generate_hash_name(name, content)
+        acquire([name])
+        self.instance._media_file_acquired = name
+        if not self.storage.exists(name):
+            name = self.storage.save(name, content, max_length=self.field.max_length)
+        self.name = name
+        setattr(self.instance, self.field.name, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+
+class ContentHashImageField(ImageField):
+    """
+    upload_to 디렉토리 아래 content hash 이름으로 저장하는 ImageField
+    size_field: 바이트 크기를 저장할 필드
+    """
+    attr_class = ContentHashFieldFile
+
+    def __init__(self, verbose_name=None, name=None, size_field=None, **kwargs):
+        self.size_field = size_field
+        super().__init__(verbose_name, name, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.size_field:
+            kwargs['size_field'] = self.size_field
+        return name, path, args, kwargs
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        """
+        새로 올린 파일(아직 저장 전)일 때만 헤더를 읽어 가로, 세로, 바이트 크기 저장
+        이미 저장된 파일은 DB 값을 그대로 사용 (ImageField 는 값이 비어 있으면 불러올 때마다 storage 를 읽음)
+        """
+        if self.attname not in instance.__dict__:
+            return
+        file = getattr(instance, self.attname)
+        if not file or file._committed:
+            return
+        super().update_dimension_fields(instance, True, *args, **kwargs)
+        if self.size_field:
+            setattr(instance, self.size_field, file.size)
+
+    def generate_hash_name(self, filename, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        _, ext = os.path.splitext(filename)
+        return f'{self.upload_to}/{digest[:2]}/{digest}{ext.lower()}'
+
+
+def acquire(names):
+    """names 파일 참조 수 + 1"""
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    MediaFile.objects.bulk_create([MediaFile(name=name) for name in counts], ignore_conflicts=True)
+    bulk_increment(MediaFile, 'ref_count', counts)
+
+
+def release(names):
+    """names 파일 참조 수 - 1, 커밋 후 아무도 가리키지 않는 파일 삭제"""
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    bulk_increment(MediaFile, 'ref_count', {name: -count for name, count in counts.items()})
+    names = list(counts)
+    transaction.on_commit(lambda: delete_unused(names))
+
+
+def delete_unused(names):
+    """
+    참조 수가 0 인 파일 삭제
+    row lock 을 잡고 다시 확인하므로 그 사이 같은 파일을 acquire 한 업로드(ContentHashFieldFile.save)와 겹치지 않음
+    """
+    with transaction.atomic():
+        unused = list(MediaFile.objects.select_for_update().
+                      filter(name__in=names, ref_count=0).values_list('name', flat=True))
+        MediaFile.objects.filter(name__in=unused).delete()
+        for name in unused:
+            delete_file(name)
+
+
+def delete_file(name):
+    default_storage.delete(name)
+    for variant in settings.IMAGE_VARIANTS:
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            default_storage.delete(images.get_variant_name(name, variant, image_format))
+
+
+def get_saved_name(instance):
+    """
+    row 에 저장된 파일 이름 (img 를 읽어도 쿼리가 나가지 않도록 __dict__ 에서)
+    아직 저장 안 된 업로드는 '', 불러오지 않은(deferred) 필드는 None
+    """
+    if 'img' not in instance.__dict__:
+        return None
+    value = instance.__dict__['img']
+    if isinstance(value, FieldFile):
+        return (value.name or '') if value._committed else ''
+    if isinstance(value, str):
+        return value
+    return ''
+
+
+def remember_file(sender, instance, **kwargs):
+    instance._media_file_name = get_saved_name(instance)
+
+
+def update_file_refs(sender, instance, **kwargs):
+    """파일이 바뀌었으면 새 파일 + 1 (업로드하면서 센 참조는 제외), 이전 파일 - 1"""
+    old_name, new_name = instance._media_file_name, get_saved_name(instance)
+    acquired = instance.__dict__.pop('_media_file_acquired', None)
+    if old_name is None or new_name is None:
+        return
+    if old_name == new_name:
+        if acquired == new_name:
+            # 같은 파일을 다시 올림
+            release([new_name])
+        return
+    if acquired != new_name:
+        acquire([new_name])
+    release([old_name])
+    instance._media_file_name = new_name
+
+
+def release_file_ref(sender, instance, **kwargs):
+    release([instance._media_file_name])
+
+
+def acquire_created(instances):
+    """bulk_create 로 만든 row 들의 파일 참조 수 + 1 (signal 이 없으므로 직접)"""
+    acquire([instance.img.name for instance in instances
+             if instance.__dict__.get('_media_file_acquired') != instance.img.name])
+    for instance in instances:
+        instance._media_file_name = instance.img.name
+        instance.__dict__.pop('_media_file_acquired', None)
+
+
+def track(model):
+    """model.img 파일 참조 수 관리 (생성, 교체, 삭제)"""
+    post_init.connect(remember_file, sender=model, weak=False)
+    post_save.connect(update_file_refs, sender=model, weak=False)
+    post_delete.connect(release_file_ref, sender=model, weak=False)
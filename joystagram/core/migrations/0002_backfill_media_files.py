@@ -0,0 +1,32 @@
+# Generated by Django 3.0.7 on 2020-08-11 04:20
+
+from collections import Counter
+
+from django.db import migrations
+
+IMAGE_MODELS = [('posts', 'Photo'), ('users', 'Profile'), ('story', 'Story')]
+
+
+def backfill_media_files(apps, schema_editor):
+    """기존 row 들이 가리키는 파일 참조 수"""
+    MediaFile = apps.get_model('core', 'MediaFile')
+    counts = Counter()
+    for app_label, model_name in IMAGE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        counts.update(model.objects.exclude(img='').values_list('img', flat=True).iterator())
+    MediaFile.objects.bulk_create([MediaFile(name=name, ref_count=count) for name, count in counts.items()],
+                                  batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0017_alter_photo_img'),
+        ('users', '0007_alter_profile_img'),
+        ('story', '0009_alter_story_img'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_media_files, migrations.RunPython.noop),
+    ]
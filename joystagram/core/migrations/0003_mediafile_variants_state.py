@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+IMAGE_MODELS = [('posts', 'Photo'), ('users', 'Profile'), ('story', 'Story')]
+
+
+def fill_variants_state(apps, schema_editor):
+    """변형 이미지가 이미 있는 파일은 ready, placeholder 복사"""
+    MediaFile = apps.get_model('core', 'MediaFile')
+    for app_label, model_name in IMAGE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        ready = model.objects.filter(img=OuterRef('name'), variants_source=OuterRef('name'))
+        MediaFile.objects.filter(variants_state=0, name__in=ready.values('img')).update(
+            variants_state=2,
+            placeholder=Subquery(ready.values('img_placeholder')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_backfill_media_files'),
+        ('posts', '0018_photo_img_meta'),
+        ('users', '0008_profile_img_meta'),
+        ('story', '0010_story_img_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='variants_state',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'none'), (1, 'rendering'), (2, 'ready')], default=0),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(fill_variants_state, migrations.RunPython.noop),
+    ]
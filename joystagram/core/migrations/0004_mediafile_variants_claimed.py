@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_mediafile_variants_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='variants_claimed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1 +1,18 @@
 from django.db import models
+
+
+class MediaFile(models.Model):
+    """content hash 로 저장한 미디어 파일 (core.media), 가리키는 row 수"""
+    # 변형 이미지 (core.images)
+    VARIANTS_NONE = 0
+    VARIANTS_RENDERING = 1
+    VARIANTS_READY = 2
+    VARIANTS_STATES = [(VARIANTS_NONE, 'none'), (VARIANTS_RENDERING, 'rendering'), (VARIANTS_READY, 'ready')]
+
+    name = models.CharField(max_length=100, primary_key=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    variants_state = models.PositiveSmallIntegerField(choices=VARIANTS_STATES, default=VARIANTS_NONE)
+    # rendering 으로 바꾼 시간, IMAGE_VARIANTS_CLAIM_TIMEOUT 이 지나면 죽은 작업으로 보고 다시 만듦
+    variants_claimed = models.DateTimeField(null=True, blank=True)
+    # 흐린 미리보기 data URI, 같은 파일을 다시 올린 row 에 복사
+    placeholder = models.TextField(blank=True, default='')
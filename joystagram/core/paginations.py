@@ -3,3 +3,15 @@ from rest_framework import pagination
 
 class IDPagination(pagination.CursorPagination):
     ordering = '-id'
+
+    def get_cursor_window(self, request):
+        """
+        현재 요청의 페이지를 만드는 데 필요한 id 범위
+        (position, reverse, count): position 보다 작은(reverse 면 큰) id count 개
+        """
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            return None, False, page_size + 1
+        position = int(cursor.position) if cursor.position is not None else None
+        return position, cursor.reverse, cursor.offset + page_size + 1
@@ -0,0 +1,120 @@
+"""
+비정규화 카운터 재계산
+
+bulk delete, cascade 처럼 save/delete 를 거치지 않은 변경으로 틀어진 카운터를
+id 범위 청크 단위로 실제 row 수와 비교해서 고친다
+"""
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Count, IntegerField, Value, Min, Max
+from django.db.models.functions import Coalesce
+
+from core.counters import get_deltas, bulk_increment, hold_flush_lock
+
+CHECKPOINT_TIMEOUT = 60 * 60 * 24 * 7
+
+# name: 카운터 이름, model: 카운터 모델 label, field: 카운터 필드
+# get_actual: 실제 갯수 expression, buffered: core.counters 버퍼 사용 여부
+CounterSpec = namedtuple('CounterSpec', ['name', 'model', 'field', 'get_actual', 'buffered'])
+
+
+def count_of(model_label, lookup, outer_ref='pk'):
+    """model 에서 lookup 이 바깥 row 인 갯수 (상관 서브쿼리)"""
+    queryset = apps.get_model(model_label).objects.filter(**{lookup: OuterRef(outer_ref)}). \
+        order_by().values(lookup).annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(queryset, output_field=IntegerField()), Value(0))
+
+
+COUNTER_SPECS = [
+    CounterSpec('post_likes', 'posts.Post', 'likes_count',
+                lambda: count_of('likes.PostLike', 'post'), True),
+    CounterSpec('post_comments', 'posts.Post', 'comments_count',
+                lambda: count_of('comments.Comment', 'post') + count_of('comments.ReComment', 'comment__post'),
+                True),
+    CounterSpec('comment_recomments', 'comments.Comment', 'recomments_count',
+                lambda: count_of('comments.ReComment', 'comment'), True),
+    CounterSpec('profile_posts', 'users.Profile', 'posts_count',
+                lambda: count_of('posts.Post', 'owner', 'user_id'), False),
+    CounterSpec('profile_followers', 'users.Profile', 'followers_count',
+                lambda: count_of('relationships.Follow', 'to_user', 'user_id'), False),
+    CounterSpec('profile_followings', 'users.Profile', 'followings_count',
+                lambda: count_of('relationships.Follow', 'owner', 'user_id'), False),
+    CounterSpec('tag_posts', 'posts.TagStat', 'posts_count',
+                lambda: count_of('taggit.TaggedItem', 'tag'), False),
+    # flush_story_checks 로 읽음 기록을 먼저 저장한 뒤 실행
+    CounterSpec('story_read_users', 'story.Story', 'read_users_count',
+                lambda: count_of('story.StoryCheck', 'story'), True),
+]
+COUNTER_SPEC_DICT = {spec.name: spec for spec in COUNTER_SPECS}
+
+
+def get_checkpoint_key(spec):
+    return f'reconcile:{spec.name}'
+
+
+def get_checkpoint(spec):
+    return cache.get(get_checkpoint_key(spec))
+
+
+def reconcile_chunk(spec, start, end, dry_run=False):
+    """
+    start <= pk < end 범위의 카운터 재계산
+    버퍼에 남은 증감값을 빼고 비교해서 (row + 증감값 == 실제 갯수) 가 되도록 상대값으로 고침
+    청크 row 를 잠그고, 버퍼 카운터는 flush 가 끝나기를 기다린 뒤 row 와 증감값을 읽는다
+    dry_run 은 고치지 않으므로 잠그지 않음 (flush, 쓰기를 막지 않도록)
+    [(pk, 저장된 값, 고칠 값)]
+    """
+    with ExitStack() as stack:
+        if spec.buffered and not dry_run:
+            stack.enter_context(hold_flush_lock())
+        return compare_chunk(spec, start, end, dry_run)
+
+
+def compare_chunk(spec, start, end, dry_run):
+    model = apps.get_model(spec.model)
+    with transaction.atomic():
+        chunk = model.objects.filter(pk__gte=start, pk__lt=end).order_by()
+        if not dry_run:
+            list(chunk.select_for_update().values_list('pk', flat=True))
+        rows = list(chunk.annotate(actual=spec.get_actual()).values_list('pk', spec.field, 'actual'))
+        deltas = get_deltas(model, [row[0] for row in rows], spec.field) if spec.buffered else {}
+
+        diffs = []
+        for pk, stored, actual in rows:
+            target = actual - deltas.get(pk, 0)
+            if stored != target:
+                diffs.append((pk, stored, target))
+        if diffs and not dry_run:
+            bulk_increment(model, spec.field, {pk: target - stored for pk, stored, target in diffs})
+    return diffs
+
+
+def reconcile(spec, chunk_size=1000, start=None, end=None, dry_run=False, resume=False):
+    """
+    id 범위 청크마다 reconcile_chunk 후 (start, end, diffs) yield
+    청크가 끝날 때마다 체크포인트 저장 (resume 이면 체크포인트부터 시작)
+    """
+    model = apps.get_model(spec.model)
+    bounds = model.objects.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+    if bounds['min_pk'] is None:
+        return
+    if start is None:
+        start = bounds['min_pk']
+    if resume:
+        start = max(start, get_checkpoint(spec) or start)
+    end = bounds['max_pk'] + 1 if end is None else min(end, bounds['max_pk'] + 1)
+
+    while start < end:
+        chunk_end = min(start + chunk_size, end)
+        diffs = reconcile_chunk(spec, start, chunk_end, dry_run)
+        if not dry_run:
+            cache.set(get_checkpoint_key(spec), chunk_end, CHECKPOINT_TIMEOUT)
+        yield start, chunk_end, diffs
+        start = chunk_end
+
+    if not dry_run:
+        cache.delete(get_checkpoint_key(spec))
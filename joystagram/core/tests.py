@@ -1,5 +1,17 @@
 import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from model_bakery import baker
 from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APITestCase
+
+from core import counters
+from core.authentications import MyTokenAuthentication, local_token_cache
+from likes.models import PostLike
+from posts.models import Post
 
 
 class TempFileMixin:
@@ -12,3 +24,74 @@ class TempFileMixin:
         file.name = 'test.png'
         file.seek(0)
         return file
+
+
+class ReconcileCountersTestCase(APITestCase):
+    """카운터 재계산 테스트"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.post = baker.make('posts.Post')
+        baker.make('likes.PostLike', post=self.post, _quantity=3)
+        call_command('flush_counters')
+
+        # save/delete 를 거치지 않는 삭제
+        PostLike.objects.filter(id=PostLike.objects.filter(post=self.post).first().id).delete()
+
+    def get_likes_count(self):
+        post = Post.objects.get(id=self.post.id)
+        return counters.get_counters([post], ('likes_count',))[post.id]['likes_count']
+
+    def test_dry_run(self):
+        """dry-run: 차이만 출력"""
+        out = io.StringIO()
+        call_command('reconcile_counters', 'post_likes', '--dry-run', stdout=out)
+        self.assertIn(f'post_likes {self.post.id}: 3 -> 2', out.getvalue())
+        self.assertEqual(self.get_likes_count(), 3)
+
+    def test_should_reconcile(self):
+        """버퍼에 남은 증감값까지 고려해서 재계산"""
+        baker.make('likes.PostLike', post=self.post)  # flush 안 된 +1
+        call_command('reconcile_counters', 'post_likes', '--chunk-size', '1', stdout=io.StringIO())
+        self.assertEqual(self.get_likes_count(), PostLike.objects.filter(post=self.post).count())
+
+        call_command('flush_counters')
+        self.assertEqual(Post.objects.get(id=self.post.id).likes_count, 3)
+
+
+class TokenCacheTestCase(APITestCase):
+    """토큰 인증 캐시 테스트"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        local_token_cache.clear()
+        self.user = baker.make('users.User')
+        self.token = baker.make(Token, user=self.user)
+        self.authentication = MyTokenAuthentication()
+
+    def test_should_authenticate_without_query(self):
+        """캐시된 토큰은 DB 조회 없이 인증"""
+        self.authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.id, self.user.id)
+
+        # 로컬 캐시가 없어도 Redis 캐시
+        local_token_cache.clear()
+        with self.assertNumQueries(0):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_should_invalidate_on_logout(self):
+        """토큰 삭제 시 캐시 삭제"""
+        self.authentication.authenticate_credentials(self.token.key)
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_should_invalidate_on_inactive(self):
+        """비활성화 시 캐시 삭제"""
+        self.authentication.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
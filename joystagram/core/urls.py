@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework_nested import routers
 
 from comments.views import CommentViewSet, ReCommentViewSet, CommentCreateListViewSet, ReCommentCreateListViewSet
+from elastic.views import PostSearchView
 from likes.views import PostLikeViewSet, UserLikeViewSet
 from posts.views import PostViewSet, TagViewSet, TaggedPostViewSet
 from relationships.views import FollowViewSet, FollowNestedViewSet
@@ -38,4 +39,7 @@ story_nested_router.register(r'users', StoryReadUserViewSet)
 urlpatterns = router.urls + posts_nested_router.urls + comments_nested_router.urls + \
               users_nested_router.urls + tags_nested_router.urls + story_nested_router.urls
 
-urlpatterns += [path('', include('rest_framework.urls'))]
+urlpatterns += [
+    path('search/posts', PostSearchView.as_view()),
+    path('', include('rest_framework.urls')),
+]
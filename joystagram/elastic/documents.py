@@ -16,6 +16,10 @@ class PostDocument(Document):
         model = Post  # The model associated with this Document
         # The fields of the model you want to be indexed in Elasticsearch
         fields = [
+            'id',
             'content',
             'likes_count',
+            'created',
         ]
+        # 요청 안에서 색인하지 않고 elastic.indexing 큐로 모아서 bulk 색인
+        ignore_signals = True
@@ -0,0 +1,89 @@
+"""
+게시글 Elasticsearch 색인 큐
+
+Post, PostLike 가 바뀌면 요청 안에서 색인하지 않고 Redis set 에 게시글 id 만 넣는다 (같은 id 는 한 번만)
+index_posts 커맨드가 batch_size 개씩 꺼내 bulk API 한 번으로 색인 (DB 에 없으면 삭제)
+좋아요 갯수는 DB 에 반영 안 된 증감값까지 포함
+"""
+from django.db.models import Min, Max
+from django_redis import get_redis_connection
+from elasticsearch.helpers import bulk
+
+from core.counters import get_counters
+from elastic.documents import PostDocument
+from posts.models import Post
+
+QUEUE_KEY = 'elastic:posts:dirty'
+
+DOCUMENT_COUNTER_FIELDS = ('likes_count',)
+
+
+def get_redis():
+    return get_redis_connection('default')
+
+
+def enqueue(post_ids):
+    post_ids = list(post_ids)
+    if post_ids:
+        get_redis().sadd(QUEUE_KEY, *post_ids)
+
+
+def apply_counters(posts):
+    """색인할 게시글들에 증감값 포함한 카운터 채우기 (MGET 한 번)"""
+    counter_dict = get_counters(posts, DOCUMENT_COUNTER_FIELDS)
+    for post in posts:
+        for field in DOCUMENT_COUNTER_FIELDS:
+            setattr(post, field, counter_dict[post.id][field])
+    return posts
+
+
+def index_posts(posts):
+    """게시글들을 bulk 요청 한 번으로 색인"""
+    if posts:
+        PostDocument().update(apply_counters(posts), refresh=False)
+
+
+def delete_posts(post_ids):
+    """DB 에서 지워진 게시글들을 bulk 요청 한 번으로 삭제 (이미 없는 문서는 무시)"""
+    if not post_ids:
+        return
+    document = PostDocument()
+    actions = ({'_op_type': 'delete', '_index': document._index._name, '_id': post_id} for post_id in post_ids)
+    bulk(document._get_connection(), actions, raise_on_error=False)
+
+
+def flush(batch_size=500):
+    """큐에 쌓인 게시글을 batch_size 개씩 색인, 처리한 게시글 수 리턴"""
+    redis = get_redis()
+    flushed = 0
+    while True:
+        post_ids = [int(post_id) for post_id in redis.spop(QUEUE_KEY, batch_size)]
+        if not post_ids:
+            return flushed
+        try:
+            posts = list(Post.objects.filter(id__in=post_ids).order_by('id'))
+            index_posts(posts)
+            delete_posts(set(post_ids) - {post.id for post in posts})
+        except Exception:
+            # 실패한 id 는 다시 큐로
+            enqueue(post_ids)
+            raise
+        flushed += len(post_ids)
+
+
+def rebuild(chunk_size=1000):
+    """
+    전체 게시글 다시 색인
+    id 범위 청크마다 iterator() 로 읽어서 bulk 색인 (전체를 메모리에 올리지 않음)
+    (start, end, 색인한 수) yield
+    """
+    bounds = Post.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if bounds['min_id'] is None:
+        return
+    start, end = bounds['min_id'], bounds['max_id'] + 1
+    while start < end:
+        chunk_end = min(start + chunk_size, end)
+        posts = list(Post.objects.filter(id__gte=start, id__lt=chunk_end).order_by('id').iterator())
+        index_posts(posts)
+        yield start, chunk_end, len(posts)
+        start = chunk_end
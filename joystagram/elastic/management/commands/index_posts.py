@@ -0,0 +1,34 @@
+import time
+
+from django.core.management import BaseCommand
+
+from elastic import indexing
+
+
+class Command(BaseCommand):
+    help = '색인 큐에 쌓인 게시글을 Elasticsearch 에 bulk 색인 (--rebuild: 전체 다시 색인)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=0,
+                            help='0 보다 크면 interval 초마다 계속 색인')
+        parser.add_argument('--rebuild', action='store_true', help='전체 게시글 id 범위 청크 단위로 다시 색인')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            indexed = 0
+            for start, end, count in indexing.rebuild(options['chunk_size']):
+                indexed += count
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'[{start}, {end}) {count} indexed')
+            self.stdout.write(self.style.SUCCESS(f'{indexed} posts indexed'))
+            return
+
+        while True:
+            flushed = indexing.flush(options['batch_size'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f'flushed {flushed} posts')
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
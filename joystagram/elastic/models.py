@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from elastic import indexing
+from likes.models import PostLike
+from posts.models import Post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def enqueue_post(sender, instance, **kwargs):
+    """
+    게시글 생성, 수정, 삭제 시 커밋 후 색인 큐에 추가
+    (커밋 전에 flush 가 꺼내 가면 새 게시글은 아직 안 보여 삭제되고, 삭제한 게시글은 아직 보여 다시 색인됨)
+    """
+    post_id = instance.id
+    transaction.on_commit(lambda: indexing.enqueue([post_id]))
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def enqueue_liked_post(sender, instance, **kwargs):
+    """좋아요 갯수가 바뀐 게시글 커밋 후 색인 큐에 추가"""
+    post_id = instance.post_id
+    transaction.on_commit(lambda: indexing.enqueue([post_id]))
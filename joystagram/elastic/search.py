@@ -0,0 +1,86 @@
+"""
+게시글 검색
+
+elasticsearch: content 텍스트 점수 x log(좋아요 갯수) x 최신순 감쇠(gauss) 로 정렬
+database: 검색 클러스터가 없는 로컬, 테스트용 PostgreSQL full-text search (posts 0015 GIN 인덱스)
+        텍스트 점수 x log(좋아요 갯수)
+둘 다 (점수, id) 정렬이고 다음 페이지는 마지막 결과의 정렬 값(search_after) 으로
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Q, FloatField, ExpressionWrapper
+from django.db.models.functions import Ln
+from elasticsearch_dsl import Q as ESQ, SF
+from rest_framework.exceptions import NotFound
+
+from elastic.documents import PostDocument
+from posts.models import Post
+
+SEARCH_CONFIG = 'simple'
+
+
+def encode_cursor(after):
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [float(score), int(post_id)]
+    except (binascii.Error, ValueError, TypeError):
+        raise NotFound('Invalid cursor')
+
+
+def search_posts(query, after=None, size=15):
+    """
+    검색어에 맞는 게시글 id 를 점수 순으로 size 개
+    (post_ids, 다음 페이지 after 또는 None)
+    """
+    if settings.POST_SEARCH_BACKEND == 'elasticsearch':
+        rows = search_elasticsearch(query, after, size)
+    else:
+        rows = search_database(query, after, size)
+    next_after = list(rows[-1]) if len(rows) == size else None
+    return [post_id for score, post_id in rows], next_after
+
+
+def search_elasticsearch(query, after, size):
+    search = PostDocument.search().query(
+        'function_score',
+        query=ESQ('match', content=query),
+        functions=[
+            SF('field_value_factor', field='likes_count', modifier='log2p', missing=0),
+            SF('gauss', created={'origin': 'now', 'scale': settings.POST_SEARCH_RECENCY_SCALE, 'decay': 0.5}),
+        ],
+        score_mode='multiply',
+        boost_mode='multiply',
+    ).sort('_score', {'id': 'desc'}).source(False)[:size]
+    if after is not None:
+        search = search.extra(search_after=after)
+    return [(hit.meta.sort[0], int(hit.meta.sort[1])) for hit in search.execute()]
+
+
+def search_database(query, after, size):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG)
+    queryset = Post.objects.annotate(
+        document=SearchVector('content', config=SEARCH_CONFIG),
+    ).filter(document=search_query).annotate(
+        score=ExpressionWrapper(
+            SearchRank(F('document'), search_query) * Ln(F('likes_count') + 2),
+            output_field=FloatField(),
+        ),
+    )
+    if after is not None:
+        score, post_id = after
+        queryset = queryset.filter(Q(score__lt=score) | Q(score=score, id__lt=post_id))
+    return list(queryset.order_by('-score', '-id').values_list('score', 'id')[:size])
+
+
+def hydrate(post_ids):
+    """검색 결과 id 순서대로 게시글 (in_bulk 한 번, 색인에만 남은 삭제된 게시글은 제외)"""
+    posts = Post.objects.select_related('owner__profile').prefetch_related('photos', 'tags').in_bulk(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -1,3 +1,169 @@
-from django.test import TestCase
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from elasticsearch_dsl.connections import connections
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core import counters
+from core.paginations import IDPagination
+from elastic import indexing
+from posts.models import Post
+
+BULK_ACTIONS = ('index', 'create', 'update', 'delete')
+
+
+class StubElasticsearchHandler(BaseHTTPRequestHandler):
+    """
+    Elasticsearch 흉내
+    bulk 요청의 action 들은 server.actions, 검색 요청 body 는 server.searches 에 기록
+    검색 결과는 server.search_hits [(score, id)]
+    """
+
+    def do_GET(self):
+        self.send_json({'version': {'number': '7.8.0', 'build_flavor': 'default'}, 'tagline': 'You Know, for Search'})
+
+    def do_HEAD(self):
+        self.send_json({})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        if '_search' in self.path:
+            self.server.searches.append(json.loads(body))
+            hits = [{'_index': 'posts', '_id': str(post_id), '_score': None, 'sort': [score, post_id]}
+                    for score, post_id in self.server.search_hits]
+            self.send_json({'took': 1, 'timed_out': False,
+                            'hits': {'total': {'value': len(hits), 'relation': 'eq'}, 'max_score': None,
+                                     'hits': hits}})
+            return
+        lines = iter(json.loads(line) for line in body.splitlines() if line.strip())
+        items = []
+        for line in lines:
+            op_type = next(op for op in BULK_ACTIONS if op in line)
+            source = next(lines) if op_type != 'delete' else None
+            self.server.actions.append((op_type, str(line[op_type]['_id']), source))
+            items.append({op_type: {'_id': line[op_type]['_id'], 'status': 200}})
+        self.send_json({'took': 1, 'errors': False, 'items': items})
+
+    def send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubElasticsearchMixin:
+    def setUp(self) -> None:
+        cache.clear()
+        self.server = HTTPServer(('127.0.0.1', 0), StubElasticsearchHandler)
+        self.server.actions = []
+        self.server.searches = []
+        self.server.search_hits = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        connections.create_connection(hosts=[f'127.0.0.1:{self.server.server_port}'])
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        connections.create_connection(**settings.ELASTICSEARCH_DSL['default'])
+
+
+class PostIndexingTestCase(StubElasticsearchMixin, TransactionTestCase):
+    """게시글 색인 큐 테스트 (stub HTTP 서버, 큐에는 커밋 후 추가)"""
+
+    def test_should_enqueue_after_commit(self):
+        """트랜잭션 안의 변경은 커밋 후에 색인 큐에 추가"""
+        redis = indexing.get_redis()
+        with transaction.atomic():
+            post = baker.make('posts.Post', content='hello')
+            self.assertFalse(redis.sismember(indexing.QUEUE_KEY, post.id))
+        self.assertTrue(redis.sismember(indexing.QUEUE_KEY, post.id))
+
+    def test_should_coalesce_and_flush(self):
+        """같은 게시글의 여러 변경은 한 번만, bulk 요청으로 색인, 좋아요 갯수는 증감값 포함"""
+        post = baker.make('posts.Post', content='hello')
+        baker.make('likes.PostLike', post=post, _quantity=2)
+        deleted = baker.make('posts.Post')
+        deleted_id = deleted.id
+        deleted.delete()
+        self.assertEqual(self.server.actions, [])  # 요청 안에서는 색인하지 않음
+
+        self.assertEqual(indexing.flush(), 2)
+        self.assertEqual(sorted(self.server.actions, key=lambda action: action[0]), [
+            ('delete', str(deleted_id), None),
+            ('index', str(post.id), {'id': post.id, 'content': 'hello', 'likes_count': 2,
+                                     'created': post.created.isoformat()}),
+        ])
+        self.assertEqual(indexing.flush(), 0)
+
+    def test_should_rebuild(self):
+        """전체 다시 색인: id 범위 청크마다 bulk 요청"""
+        posts = baker.make('posts.Post', _quantity=5)
+        counters.incr_counter(Post, posts[0].id, 'likes_count', 3)
+
+        chunks = list(indexing.rebuild(chunk_size=2))
+        self.assertEqual(sum(count for start, end, count in chunks), 5)
+        self.assertEqual(len(chunks), 3)
+        indexed = {int(post_id): source for op_type, post_id, source in self.server.actions}
+        self.assertEqual(set(indexed), {post.id for post in posts})
+        self.assertEqual(indexed[posts[0].id]['likes_count'], 3)
+
+
+class PostSearchTestCase(StubElasticsearchMixin, APITestCase):
+    """게시글 검색 테스트"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = baker.make('users.User')
+        self.posts = baker.make('posts.Post', content='hello world', _quantity=3)
+        Post.objects.filter(id=self.posts[1].id).update(likes_count=10)
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(POST_SEARCH_BACKEND='elasticsearch')
+    def test_search_elasticsearch(self):
+        """검색 결과 순서대로 게시글 조회, 삭제된 게시글 제외"""
+        self.server.search_hits = [(3.0, self.posts[1].id), (2.0, self.posts[0].id), (1.0, self.posts[2].id + 100)]
+        response = self.client.get('/api/search/posts', {'q': 'hello'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.posts[1].id, self.posts[0].id])
+        self.assertEqual(response.data['results'][0]['likes_count'], 10)
+        self.assertIsNone(response.data['next'])
+        self.assertIn('function_score', self.server.searches[0]['query'])
+
+    @override_settings(POST_SEARCH_BACKEND='elasticsearch')
+    @mock.patch.object(IDPagination, 'page_size', 1)
+    def test_search_elasticsearch_cursor(self):
+        """다음 페이지는 search_after"""
+        self.server.search_hits = [(3.0, self.posts[1].id)]
+        response = self.client.get('/api/search/posts', {'q': 'hello'})
+        self.client.get(response.data['next'])
+        self.assertEqual(self.server.searches[1]['search_after'], [3.0, self.posts[1].id])
+
+    @override_settings(POST_SEARCH_BACKEND='database')
+    @mock.patch.object(IDPagination, 'page_size', 2)
+    def test_search_database(self):
+        """PostgreSQL full-text search: 좋아요 많은 순, 다음 페이지"""
+        baker.make('posts.Post', content='bye')
+        response = self.client.get('/api/search/posts', {'q': 'hello'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        first_page = [post['id'] for post in response.data['results']]
+        self.assertEqual(first_page[0], self.posts[1].id)
+
+        response = self.client.get(response.data['next'])
+        second_page = [post['id'] for post in response.data['results']]
+        self.assertEqual(sorted(first_page + second_page), sorted(post.id for post in self.posts))
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,45 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.counters import get_counters
+from elastic import search
+from likes.models import PostLike
+from posts.serializers import PostListSerializer
+from posts.views import POST_COUNTER_FIELDS
+
+
+class PostSearchView(GenericAPIView):
+    """
+    게시글 검색 (텍스트 점수, 좋아요 갯수, 최신순)
+    GET /api/search/posts?q=&cursor=
+    """
+    serializer_class = PostListSerializer
+    cursor_query_param = 'cursor'
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q')
+        if not query:
+            raise ParseError('query parameter required: q not supplied')
+        cursor = request.query_params.get(self.cursor_query_param)
+        after = search.decode_cursor(cursor) if cursor else None
+
+        post_ids, next_after = search.search_posts(query, after, self.paginator.get_page_size(request))
+        posts = search.hydrate(post_ids)
+
+        # like_id, 좋아요, 댓글 갯수 주입
+        self.like_id_dict = {}
+        if request.user.is_authenticated:
+            like_qs = PostLike.objects.filter(owner=request.user, post__in=post_ids)
+            self.like_id_dict = {like.post_id: like.id for like in like_qs}
+        self.counter_dict = get_counters(posts, POST_COUNTER_FIELDS)
+
+        next_url = None
+        if next_after is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), self.cursor_query_param,
+                                           search.encode_cursor(next_after))
+        return Response({
+            'next': next_url,
+            'results': self.get_serializer(posts, many=True).data,
+        })
@@ -192,6 +192,51 @@ CACHES = {
         }
     }
 }
+# 홈 타임라인(posts.timelines): 유저별 최신 게시글 id 저장 갯수, 유지 시간
+TIMELINE_MAX_LENGTH = 800
+TIMELINE_TIMEOUT = 60 * 60 * 24 * 7
+# 팔로워가 이 수 이상인 유저의 게시글은 fan-out 하지 않고 읽을 때 합침 (None: 모두 fan-out)
+TIMELINE_CELEBRITY_THRESHOLD = 10000
+# 팔로우 여부 캐시(relationships.caches) 사용 여부, 유지 시간
+FOLLOW_CACHE_ENABLED = True
+FOLLOW_CACHE_TIMEOUT = 60 * 60 * 24
+# 토큰 인증 캐시(core.authentications): Redis 유지 시간, 프로세스 로컬 LRU 크기, 유지 시간
+AUTH_TOKEN_CACHE_TIMEOUT = 60 * 5
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_CACHE_TIMEOUT = 5
+# 비밀번호 해싱(users.passwords) 스레드 풀 크기 (0: 요청 스레드에서 바로 해싱), 대기열 크기
+PASSWORD_HASHER_WORKERS = 0
+PASSWORD_HASHER_QUEUE_SIZE = 16
+# 태그 자동완성 메모리 인덱스(posts.search) 갱신 주기(초)
+TAG_AUTOCOMPLETE_REFRESH = 60
+# 태그별 게시글 인덱스(posts.indexes): 태그마다 메모리에 둘 최신 게시글 id 갯수, 유지 시간
+TAG_POSTS_MAX_LENGTH = 1000
+TAG_POSTS_TIMEOUT = 60 * 60 * 24
+# 닉네임 자동완성(users.search) 접두어 결과 프로세스 로컬 캐시 크기, 유지 시간(초)
+USER_AUTOCOMPLETE_CACHE_SIZE = 10000
+USER_AUTOCOMPLETE_CACHE_TIMEOUT = 30
+# 이미지 변형(core.images): 변형별 최대 가로, 세로 크기, 저장 포맷, 프로세스 풀 크기 (0: 요청 안에서 바로 생성)
+IMAGE_VARIANTS = {'thumbnail': 150, 'feed': 640, 'full': 1080}
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_WORKERS = 2
+# 변형 생성 중(rendering) 표시 유지 시간, 지나면 작업이 죽은 것으로 보고 다음 업로드가 다시 생성
+IMAGE_VARIANTS_CLAIM_TIMEOUT = 60 * 10
+# 이미지 업로드(core.images.HeaderImageField): 파일 하나 최대 크기, 최대 픽셀 수, 허용 포맷, 게시글 사진 최대 갯수
+IMAGE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF', 'MPO')
+POST_PHOTOS_MAX_COUNT = 10
+# 업로드 파일은 크기와 상관없이 메모리에 올리지 않고 임시 파일로 (64KB 청크씩 기록)
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+# 파일이 아닌 요청 body 최대 크기
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440
+# 스토리 트레이(story.trays) 유지 시간
+STORY_TRAY_TIMEOUT = 60 * 60 * 24
+# 스토리 읽은 유저 set(story.checks) 유지 시간 (스토리가 보이는 24시간보다 길게)
+STORY_VIEWERS_TIMEOUT = 60 * 60 * 48
+# 스토리 조회 캐시(story.caches) 유지 시간
+STORY_CACHE_TIMEOUT = 60 * 10
+
 DEBUG_TOOLBAR_PANELS = [
     'ddt_request_history.panels.request_history.RequestHistoryPanel',  # Here it is
     'debug_toolbar.panels.versions.VersionsPanel',
@@ -292,3 +337,7 @@ ELASTICSEARCH_DSL = {
         'hosts': 'localhost:9200'
     },
 }
+# 게시글 검색(elastic.search) 백엔드: elasticsearch, database (검색 클러스터 없을 때 PostgreSQL full-text search)
+POST_SEARCH_BACKEND = os.environ.get('POST_SEARCH_BACKEND', 'elasticsearch')
+# 게시글 검색 최신순 감쇠: 이 기간 지난 게시글은 점수 절반
+POST_SEARCH_RECENCY_SCALE = '30d'
@@ -5,3 +5,6 @@ DEFAULT_FILE_STORAGE = 'inmemorystorage.InMemoryStorage'
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
+
+POST_SEARCH_BACKEND = 'database'
+IMAGE_WORKERS = 0
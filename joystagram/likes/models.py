@@ -1,7 +1,7 @@
 from django.db import models
-from django.db.models import F
 from model_utils.models import TimeStampedModel
 
+from core.counters import incr_counter
 from posts.models import Post
 
 
@@ -14,10 +14,12 @@ class PostLike(TimeStampedModel):
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         """Post의 좋아요 갯수 + 1"""
+        adding = self._state.adding
         super().save(force_insert, force_update, using, update_fields)
-        Post.objects.filter(id=self.post.id).update(likes_count=F('likes_count') + 1)
+        if adding:
+            incr_counter(Post, self.post_id, 'likes_count', 1)
 
     def delete(self, using=None, keep_parents=False):
         """Post의 좋아요 갯수 - 1"""
-        Post.objects.filter(id=self.post.id).update(likes_count=F('likes_count') - 1)
+        incr_counter(Post, self.post_id, 'likes_count', -1)
         return super().delete(using, keep_parents)
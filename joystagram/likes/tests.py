@@ -1,8 +1,12 @@
+from django.core.cache import cache
+from django.core.management import call_command
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core import counters
 from likes.models import PostLike
+from posts.models import Post
 from users.models import Profile, User
 
 INVALID_ID = -1
@@ -52,6 +56,22 @@ class PostLikeTestCase(APITestCase):
         response = self.client.delete(f'{self.url}/{post_like.id}')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, response.data)
 
+    def test_should_flush_likes_count(self):
+        """좋아요 갯수는 flush 때 DB 에 반영"""
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.likes_count, 0)
+        self.assertEqual(counters.get_counters([post], ('likes_count',))[post.id]['likes_count'], 1)
+
+        call_command('flush_counters')
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(counters.get_deltas(Post, [post.id], 'likes_count'), {post.id: 0})
+
     def test_should_denied_delete401(self):
         """삭제-인증 필요"""
         post_like = baker.make('likes.PostLike', owner=self.user, post=self.post)
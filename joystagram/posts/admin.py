@@ -17,8 +17,9 @@ class PostAdmin(admin.ModelAdmin):
 
 @admin.register(Photo)
 class PhotoAdmin(admin.ModelAdmin):
-    list_display = ['id', 'post']
-    readonly_fields = ['image']
+    list_display = ['id', 'post', 'img_width', 'img_height', 'img_size']
+    readonly_fields = ['image', 'img_width', 'img_height', 'img_size', 'img_placeholder']
 
     def image(self, obj):
-        return mark_safe(f'<img src="{obj.img.url}" width="{obj.img.width}" height={obj.img.width} />')
+        """저장된 가로, 세로 사용 (obj.img.width 는 storage 에서 파일을 읽음)"""
+        return mark_safe(f'<img src="{obj.img.url}" width="{obj.img_width or ""}" height="{obj.img_height or ""}" />')
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+from core.indexes import IDIndex
+
+# 태그별 게시글 id (최신 TAG_POSTS_MAX_LENGTH 개, 그보다 과거는 DB 에서 조회)
+tag_posts = IDIndex('tag_posts', settings.TAG_POSTS_MAX_LENGTH, settings.TAG_POSTS_TIMEOUT)
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2020-08-06 03:12
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_reported'),
+        ('taggit', '0003_taggeditem_add_unique_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # name__icontains, name__istartswith 는 UPPER(name) LIKE 로 검색하므로 UPPER(name) 에 trigram 인덱스
+        migrations.RunSQL(
+            'CREATE INDEX taggit_tag_name_upper_trgm ON taggit_tag USING gin (UPPER(name::text) gin_trgm_ops);',
+            'DROP INDEX IF EXISTS taggit_tag_name_upper_trgm;',
+        ),
+    ]
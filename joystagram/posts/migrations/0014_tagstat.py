@@ -0,0 +1,35 @@
+# Generated by Django 3.0.7 on 2020-08-06 07:41
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_tag_stats(apps, schema_editor):
+    """기존 태그 사용 횟수 채우기"""
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('posts', 'TagStat')
+    counts = TaggedItem.objects.order_by().values('tag_id').annotate(count=Count('id'))
+    TagStat.objects.bulk_create(
+        (TagStat(tag_id=row['tag_id'], posts_count=row['count']) for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taggit', '0003_taggeditem_add_unique_index'),
+        ('posts', '0013_tag_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='taggit.Tag')),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_tag_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.0.7 on 2020-08-07 06:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_tagstat'),
+    ]
+
+    operations = [
+        # elastic.search 의 database 검색: SearchVector('content', config='simple') 과 같은 식에 GIN 인덱스
+        migrations.RunSQL(
+            "CREATE INDEX posts_post_content_search ON posts_post "
+            "USING gin (to_tsvector('simple'::regconfig, COALESCE(content, '')));",
+            'DROP INDEX IF EXISTS posts_post_content_search;',
+        ),
+    ]
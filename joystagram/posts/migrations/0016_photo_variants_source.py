@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2020-08-10 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_content_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='variants_source',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.7 on 2020-08-12 02:45
+
+import core.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_alter_photo_img'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='img_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='img_placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='img_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='img_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='img',
+            field=core.media.ContentHashImageField(height_field='img_height', size_field='img_size', upload_to='post_img', width_field='img_width'),
+        ),
+    ]
@@ -1,8 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
 from model_utils.models import TimeStampedModel
 from taggit.managers import TaggableManager
 from taggit.models import TagBase, TaggedItemBase, Tag
 
+from core import media
+from posts import timelines
+from posts.indexes import tag_posts
+from users.models import Profile
+
 
 class Post(TimeStampedModel):
     owner = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='posts')
@@ -12,11 +21,94 @@ class Post(TimeStampedModel):
     tags = TaggableManager(blank=True)
     reported = models.BooleanField(default=False)
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """작성자 게시글 갯수 + 1"""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(force_insert, force_update, using, update_fields)
+            if adding:
+                Profile.objects.filter(user_id=self.owner_id).update(posts_count=F('posts_count') + 1)
+
+    def delete(self, using=None, keep_parents=False):
+        """작성자 게시글 갯수 - 1 (태그는 remove_from_indexes)"""
+        with transaction.atomic():
+            result = super().delete(using, keep_parents)
+            Profile.objects.filter(user_id=self.owner_id).update(posts_count=Greatest(F('posts_count') - 1, 0))
+        return result
+
+
+class TagStat(models.Model):
+    """태그 사용 횟수 (태그된 게시글 수)"""
+    tag = models.OneToOneField('taggit.Tag', on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    posts_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def increment(cls, tag_ids, delta):
+        """tag_ids 의 사용 횟수 증감 (처음 쓰이는 태그는 row 생성)"""
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return
+        if delta > 0:
+            cls.objects.bulk_create([cls(tag_id=tag_id) for tag_id in tag_ids], ignore_conflicts=True)
+        cls.objects.filter(tag_id__in=tag_ids).update(posts_count=F('posts_count') + delta)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_tag_ids(sender, instance, **kwargs):
+    """cascade 로 태그가 먼저 지워지기 전에 태그 id 저장"""
+    instance._tag_ids = list(instance.tags.values_list('id', flat=True))
+
 
+@receiver(post_delete, sender=Post)
+def remove_from_indexes(sender, instance, **kwargs):
+    """
+    admin, cascade, queryset 삭제 포함 게시글이 지워지면 태그 사용 횟수 - 1
+    커밋 후 타임라인, 태그별 게시글 인덱스에서 제거
+    """
+    owner_id, post_id, tag_ids = instance.owner_id, instance.id, getattr(instance, '_tag_ids', [])
+    TagStat.increment(tag_ids, -1)
+
+    def remove():
+        timelines.remove_post(owner_id, post_id)
+        tag_posts.remove(tag_ids, post_id)
+    transaction.on_commit(remove)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_stat(sender, instance, action, reverse, **kwargs):
+    """
+    게시글 태그 추가, 삭제 시 태그 사용 횟수, 태그별 게시글 인덱스 갱신
+    pk_set 대신 전후 태그 id 를 비교 (taggit 버전마다 remove 의 pk_set 이 다름)
+    """
+    if reverse or not isinstance(instance, Post):
+        return
+    if action in ('pre_add', 'pre_remove', 'pre_clear'):
+        instance._tag_ids_before = set(instance.tags.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        before = getattr(instance, '_tag_ids_before', set())
+        after = set(instance.tags.values_list('id', flat=True))
+        TagStat.increment(after - before, 1)
+        TagStat.increment(before - after, -1)
+        tag_posts.push(after - before, instance.id)
+        tag_posts.remove(before - after, instance.id)
+
+
+# 이전 마이그레이션에서 참조
 def post_img_path(instance, filename):
     return f'post_img/{instance.post.owner_id}/{filename}'
 
 
 class Photo(models.Model):
     post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='photos')
-    img = models.ImageField(upload_to=post_img_path)
+    img = media.ContentHashImageField(upload_to='post_img', width_field='img_width', height_field='img_height',
+                                      size_field='img_size')
+    img_width = models.PositiveIntegerField(null=True, blank=True)
+    img_height = models.PositiveIntegerField(null=True, blank=True)
+    img_size = models.PositiveIntegerField(null=True, blank=True)
+    # 흐린 미리보기 data URI (core.images)
+    img_placeholder = models.TextField(blank=True, default='')
+    # 변형 이미지(core.images)를 만든 원본 이름
+    variants_source = models.CharField(max_length=100, blank=True, default='')
+
+
+media.track(Photo)
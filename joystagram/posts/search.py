@@ -0,0 +1,63 @@
+"""
+태그 자동완성 인덱스
+
+프로세스 메모리에 소문자 태그 이름 정렬 배열을 두고 bisect 로 접두어 범위를 찾은 뒤
+사용 횟수(태그된 게시글 수) 순으로 상위 limit 개를 리턴
+TAG_AUTOCOMPLETE_REFRESH 초마다 DB 에서 새로 만든다 (새 태그는 그 사이 검색되지 않음)
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models.functions import Coalesce
+from taggit.models import Tag
+
+from core.caches import LRUCache
+
+TagEntry = namedtuple('TagEntry', ['id', 'name', 'posts_count'])
+
+
+class TagIndex:
+    def __init__(self, refresh, cache_size=10000):
+        self.refresh = refresh
+        # (소문자 이름 정렬 배열, 같은 순서의 TagEntry 배열), 읽는 중에 바뀌지 않도록 한 번에 교체
+        self.data = ([], [])
+        self.built = None
+        self._cache = LRUCache(cache_size, refresh)
+        self._lock = threading.Lock()
+
+    def build(self):
+        rows = Tag.objects.annotate(posts_count=Coalesce('stat__posts_count', 0)). \
+            values_list('id', 'name', 'posts_count')
+        entries = sorted((TagEntry(*row) for row in rows), key=lambda entry: entry.name.lower())
+        self.data = ([entry.name.lower() for entry in entries], entries)
+        self._cache.clear()
+        self.built = time.monotonic()
+
+    def ensure_built(self):
+        if self.built is None or time.monotonic() - self.built > self.refresh:
+            with self._lock:
+                if self.built is None or time.monotonic() - self.built > self.refresh:
+                    self.build()
+
+    def search(self, prefix, limit=10):
+        """prefix 로 시작하는 태그를 사용 횟수, 이름 순으로 limit 개 [TagEntry]"""
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        self.ensure_built()
+        cache_key = (prefix, limit)
+        result = self._cache.get(cache_key)
+        if result is None:
+            keys, entries = self.data
+            start = bisect_left(keys, prefix)
+            end = bisect_left(keys, prefix + '\U0010ffff', start)
+            result = heapq.nsmallest(limit, entries[start:end], key=lambda entry: (-entry.posts_count, entry.name))
+            self._cache.set(cache_key, result)
+        return result
+
+
+tag_index = TagIndex(settings.TAG_AUTOCOMPLETE_REFRESH)
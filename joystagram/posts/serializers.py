@@ -1,21 +1,28 @@
-from django.core.cache import cache
+from django.conf import settings
 from rest_framework import serializers
-from rest_framework.fields import ListField, ImageField
+from rest_framework.fields import ListField
 from taggit.models import Tag
 
+from core import media
+from core.counters import get_counters
+from core.images import HeaderImageField, ImageMetaField, ImageVariantsField, generate_variants
+from posts import timelines
 from posts.models import Post, Photo
 from users.serializers import SimpleProfileSerializer
 from taggit_serializer.serializers import TagListSerializerField, TaggitSerializer
 
 
 class PhotoSerializer(serializers.ModelSerializer):
+    img_variants = ImageVariantsField()
+    img_meta = ImageMetaField()
+
     class Meta:
         model = Photo
-        fields = ('id', 'img')
+        fields = ('id', 'img', 'img_variants', 'img_meta')
 
 
 class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
-    photos = ListField(child=ImageField(), write_only=True)
+    photos = ListField(child=HeaderImageField(), write_only=True, max_length=settings.POST_PHOTOS_MAX_COUNT)
     _photos = PhotoSerializer(many=True, read_only=True, source='photos')
     owner = SimpleProfileSerializer(read_only=True)
     tags = TagListSerializerField(required=False)
@@ -34,6 +41,9 @@ class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
             photo = Photo(post=post, img=image_data)
             photo_bulk_list.append(photo)
         Photo.objects.bulk_create(photo_bulk_list)
+        media.acquire_created(photo_bulk_list)
+        generate_variants(photo_bulk_list)
+        timelines.push_post(post)
         return post
 
 
@@ -52,20 +62,17 @@ class PostListSerializer(serializers.ModelSerializer):
         read_only_fields = ('owner', 'likes_count', 'comments_count')
 
     def get_comments_count(self, obj):
-        com_count_key = f'{obj.id}comments_count'
-        count = cache.get(com_count_key)
-        if count is None:
-            count = obj.comments_count
-            cache.set(com_count_key, count, 60)
-        return count
+        return self.get_counter(obj, 'comments_count')
 
     def get_likes_count(self, obj):
-        like_count_key = f'{obj.id}likes_count'
-        count = cache.get(like_count_key)
-        if count is None:
-            count = obj.likes_count
-            cache.set(like_count_key, count, 60)
-        return count
+        return self.get_counter(obj, 'likes_count')
+
+    def get_counter(self, obj, field):
+        """view 에서 페이지 단위로 조회한 카운터 (DB 에 반영 안 된 증감값 포함)"""
+        counter_dict = getattr(self.context['view'], 'counter_dict', None)
+        if counter_dict is None:
+            counter_dict = get_counters([obj], (field,))
+        return counter_dict[obj.id][field]
 
     def get_like_id(self, obj):
         like_id_dict = getattr(self.context['view'], 'like_id_dict', {})
@@ -84,11 +91,9 @@ class LikedPostSerializer(serializers.ModelSerializer):
 
 
 class TagListSerializer(serializers.ModelSerializer):
-    posts_count = serializers.SerializerMethodField()
+    # TagStat.posts_count 를 annotate 한 값 (view 의 queryset)
+    posts_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Tag
         fields = ('id', 'name', 'posts_count')
-
-    def get_posts_count(self, obj):
-        return obj.taggit_taggeditem_items.count()
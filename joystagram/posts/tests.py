@@ -1,12 +1,26 @@
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.test import override_settings
 from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
 from model_bakery import baker
+from PIL import Image
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from taggit.models import Tag
+from core.images import get_variant_name
+from core.models import MediaFile
 from core.tests import TempFileMixin
 from likes.models import PostLike
-from posts.models import Post
+from posts import timelines
+from posts.models import Post, Photo
+from posts.search import tag_index
 from relationships.models import Follow
 
 INVALID_ID = -1
@@ -59,6 +73,53 @@ class PostCreateTestCase(APITestCase, TempFileMixin):
         self.assertEqual(len(res['_photos']), len(self.multiple_data['photos']))
         self.assertEqual(res['tags'], self.tags)
 
+    @override_settings(IMAGE_WORKERS=0)
+    def test_should_create_img_variants(self):
+        """생성-이미지 변형 생성, 변형 URL, 가로, 세로, 크기, placeholder"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url, self.data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        photo = Photo.objects.get(post_id=response.data['id'])
+        self.assertEqual(photo.variants_source, photo.img.name)
+        img_variants = response.data['_photos'][0]['img_variants']
+        for image_format in settings.IMAGE_VARIANT_FORMATS:
+            for variant in settings.IMAGE_VARIANTS:
+                self.assertTrue(default_storage.exists(get_variant_name(photo.img.name, variant, image_format)))
+                self.assertTrue(img_variants[image_format][variant].endswith(f'__{variant}.{image_format}'))
+
+        img_meta = response.data['_photos'][0]['img_meta']
+        self.assertEqual((img_meta['width'], img_meta['height']), (1, 1))
+        self.assertEqual(img_meta['size'], photo.img_size)
+        self.assertGreater(img_meta['size'], 0)
+        self.assertTrue(img_meta['placeholder'].startswith('data:image/webp;base64,'))
+
+    def test_should_clear_corrupt_photo(self):
+        """생성-헤더만 정상인 깨진 사진은 변형 생성(전체 디코딩)에서 img 를 비움"""
+        file = io.BytesIO()
+        Image.effect_noise((64, 64), 64).save(file, 'png')
+        corrupt_file = io.BytesIO(file.getvalue()[:len(file.getvalue()) // 2])
+        corrupt_file.name = 'test.png'
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url, {**self.data, 'photos': corrupt_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        photo = Photo.objects.get(post_id=response.data['id'])
+        self.assertEqual(photo.img.name, '')
+        self.assertEqual(photo.variants_source, '')
+
+    def test_should_denied_invalid_photos(self):
+        """생성-이미지 헤더가 아닌 파일, 사진 갯수 초과"""
+        self.client.force_authenticate(user=self.user)
+        invalid_file = io.BytesIO(b'not an image')
+        invalid_file.name = 'test.png'
+        response = self.client.post(self.url, {**self.data, 'photos': invalid_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
+        photos = [self.generate_photo_file() for _ in range(settings.POST_PHOTOS_MAX_COUNT + 1)]
+        response = self.client.post(self.url, {**self.data, 'photos': photos}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
     def test_should_denied401(self):
         """생성-인증 필요"""
         response = self.client.post(
@@ -69,6 +130,66 @@ class PostCreateTestCase(APITestCase, TempFileMixin):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class PostMediaTestCase(APITransactionTestCase, TempFileMixin):
+    """게시글 사진 파일 공유, 삭제 테스트 (파일 삭제는 커밋 후)"""
+    url = '/api/posts'
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.data = {'photos': self.generate_photo_file(), 'content': 'hello joystagram!', 'tags': '["ttt"]'}
+        self.multiple_data = {'photos': [self.generate_photo_file(), self.generate_photo_file()],
+                              'content': 'hello joystagram!', 'tags': '["ttt"]'}
+        self.user = baker.make('users.User')
+        baker.make('users.Profile', user=self.user)
+
+    def test_should_share_same_img(self):
+        """생성-같은 내용의 사진은 한 번만 저장, 아무도 가리키지 않으면 커밋 후 삭제"""
+        self.client.force_authenticate(user=self.user)
+        post_ids = [self.client.post(self.url, self.multiple_data, format='multipart').data['id'],
+                    self.client.post(self.url, self.data, format='multipart').data['id']]
+
+        names = set(Photo.objects.filter(post_id__in=post_ids).values_list('img', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(name.startswith('post_img/'))
+        self.assertEqual(MediaFile.objects.get(name=name).ref_count, 3)
+        # 변형 이미지도 한 번만 만들고 모든 row 가 공유
+        self.assertEqual(MediaFile.objects.get(name=name).variants_state, MediaFile.VARIANTS_READY)
+        self.assertEqual(set(Photo.objects.filter(img=name).values_list('variants_source', flat=True)), {name})
+
+        Post.objects.get(id=post_ids[0]).delete()
+        self.assertEqual(MediaFile.objects.get(name=name).ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+        Post.objects.get(id=post_ids[1]).delete()
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_should_reclaim_stale_variants(self):
+        """생성-변형을 만들던 작업이 IMAGE_VARIANTS_CLAIM_TIMEOUT 안에 끝나지 않으면 다음 업로드가 다시 만듦"""
+        self.client.force_authenticate(user=self.user)
+        photos = [self.generate_photo_file() for _ in range(3)]
+        self.client.post(self.url, {**self.data, 'photos': photos[0]}, format='multipart')
+        name = Photo.objects.get().img.name
+
+        # 만드는 중에 작업이 죽은 상태
+        Photo.objects.invalidated_update(variants_source='', img_placeholder='')
+        claimed = timezone.now()
+        MediaFile.objects.filter(name=name). \
+            update(variants_state=MediaFile.VARIANTS_RENDERING, variants_claimed=claimed)
+
+        # 아직 timeout 전이면 다시 만들지 않음
+        self.client.post(self.url, {**self.data, 'photos': photos[1]}, format='multipart')
+        self.assertEqual(MediaFile.objects.get(name=name).variants_state, MediaFile.VARIANTS_RENDERING)
+        self.assertFalse(Photo.objects.filter(img=name, variants_source=name).exists())
+
+        stale = claimed - timedelta(seconds=settings.IMAGE_VARIANTS_CLAIM_TIMEOUT + 1)
+        MediaFile.objects.filter(name=name).update(variants_claimed=stale)
+        self.client.post(self.url, {**self.data, 'photos': photos[2]}, format='multipart')
+        self.assertEqual(MediaFile.objects.get(name=name).variants_state, MediaFile.VARIANTS_READY)
+        self.assertEqual(set(Photo.objects.filter(img=name).values_list('variants_source', flat=True)), {name})
+
+
 class PostUpdateDeleteTestCase(APITestCase):
     """게시글 수정, 삭제 테스트"""
 
@@ -122,10 +243,11 @@ class PostUpdateDeleteTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
-class PostListTestCase(APITestCase):
+class PostListTestCase(APITestCase, TempFileMixin):
     """내가 팔로우하는 유저들의 게시글 리스트"""
 
     def setUp(self) -> None:
+        cache.clear()
         users = baker.make('users.User', _quantity=4)
         posts = []
         for user in users:
@@ -144,6 +266,7 @@ class PostListTestCase(APITestCase):
         posts[2].tags.add(self.tags[0], self.tags[1])
         posts[3].tags.add(self.tags[1], self.tags[3])
         posts[4].tags.add(self.tags[0], self.tags[1], self.tags[2])
+        self.users = users
         self.user = users[0]
         self.tag = Tag.objects.get(name=self.tags[0])
 
@@ -172,6 +295,79 @@ class PostListTestCase(APITestCase):
             for photos in post_res.get('_photos'):
                 self.assertTrue(photos.get('img').endswith('jpg'))
 
+    def test_should_list_pushed_post(self):
+        """리스트-팔로우하는 유저의 새 게시글이 타임라인에 추가"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/posts')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.users[1])
+        response = self.client.post('/api/posts', {'photos': self.generate_photo_file()}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        post_id = response.data['id']
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/posts')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['id'], post_id)
+
+        # 팔로우하지 않는 유저의 게시글은 없어야 함
+        self.client.force_authenticate(user=self.users[3])
+        response = self.client.post('/api/posts', {'photos': self.generate_photo_file()}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/posts')
+        self.assertEqual(response.data['results'][0]['id'], post_id)
+
+    def test_should_list_without_deleted_post(self):
+        """리스트-타임라인에 남은 삭제된 게시글(queryset 삭제) id 는 제거하고 DB 에서 채움"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/posts')  # 타임라인 생성
+
+        Post.objects.filter(owner=self.users[1]).delete()
+        response = self.client.get('/api/posts')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post_ids = list(Post.objects.filter(
+            Q(owner_id__in=Follow.objects.filter(owner=self.user).values('to_user_id')) | Q(owner=self.user)
+        ).order_by('-id').values_list('id', flat=True))
+        self.assertEqual([post_res['id'] for post_res in response.data['results']], post_ids)
+        key = timelines.timeline.get_key(self.user.id)
+        self.assertEqual(sorted(int(member) for member in timelines.timeline.redis.zrange(key, 1, -1)),
+                         sorted(post_ids))
+
+    @override_settings(TIMELINE_CELEBRITY_THRESHOLD=1)
+    def test_should_list_pulled_post(self):
+        """리스트-팔로워가 많은 유저의 새 게시글은 읽을 때 합침"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/posts')
+
+        celebrity = self.users[1]
+        self.client.force_authenticate(user=celebrity)
+        response = self.client.post('/api/posts', {'photos': self.generate_photo_file()}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        post_id = response.data['id']
+        self.assertFalse(timelines.timeline.redis.zscore(timelines.timeline.get_key(self.user.id), post_id))
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/posts')
+        res = response.data['results']
+        self.assertEqual(res[0]['id'], post_id)
+        self.assertEqual(len(res), len(set(post['id'] for post in res)))
+
+    def test_should_list_cached_counters(self):
+        """리스트-캐싱된 좋아요 갯수도 좋아요 후 최신 값"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/posts')
+
+        post = Post.objects.filter(owner=self.user).latest('id')
+        response = self.client.post(f'/api/posts/{post.id}/likes')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        response = self.client.get('/api/posts')
+        post_res = next(res for res in response.data['results'] if res['id'] == post.id)
+        self.assertEqual(post_res['likes_count'], 1)
+
     def test_tagged_post_list(self):
         """태그를 가진 포스트 검색"""
         self.client.force_authenticate(user=self.user)
@@ -182,6 +378,22 @@ class PostListTestCase(APITestCase):
         for post in res:
             self.assertTrue(self.tag.name in post['tags'])
 
+    def test_tagged_post_list_index(self):
+        """태그별 게시글 인덱스: 태그 추가, 게시글 삭제 후에도 DB 와 같은 결과"""
+        self.client.force_authenticate(user=self.user)
+        url = f'/api/tags/{self.tag.id}/posts'
+        self.client.get(url)  # 인덱스 생성
+
+        post = baker.make('posts.Post', owner=self.users[1])
+        post.tags.add(self.tag.name)
+        Post.objects.filter(tags=self.tag).order_by('id').first().delete()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        post_ids = list(Post.objects.filter(tags=self.tag).order_by('-id').values_list('id', flat=True))
+        self.assertEqual([post_res['id'] for post_res in response.data['results']], post_ids)
+        self.assertEqual(response.data['results'][0]['id'], post.id)
+
     def test_tagged_post_list_invalid_tag_id(self):
         """포스트 검색-유효하지 않은 태그id"""
         self.client.force_authenticate(user=self.user)
@@ -201,3 +413,45 @@ class PostListTestCase(APITestCase):
         for tag_res, tag_obj in zip(res, tag_list):
             self.assertEqual(tag_res['id'], tag_obj.id)
             self.assertEqual(tag_res['name'], tag_obj.name)
+            self.assertEqual(tag_res['posts_count'], Post.objects.filter(tags=tag_obj).count())
+
+    def test_should_update_tag_posts_count(self):
+        """게시글 태그 수정, 게시글 삭제 시 태그 사용 횟수 갱신"""
+        post = Post.objects.filter(tags=self.tag).first()
+        post.tags.set('python', 'new tag')
+        post.delete()
+        post = baker.make('posts.Post', owner=self.user)
+        post.tags.add('django')
+        post.tags.clear()
+
+        for tag in Tag.objects.annotate(posts_count=Coalesce('stat__posts_count', 0)):
+            self.assertEqual(tag.posts_count, Post.objects.filter(tags=tag).count(), tag.name)
+
+    def test_should_update_tag_posts_by_queryset_delete(self):
+        """queryset 삭제 시에도 태그 사용 횟수 갱신, 태그별 게시글 리스트에서 제외"""
+        self.client.force_authenticate(user=self.user)
+        url = f'/api/tags/{self.tag.id}/posts'
+        self.client.get(url)  # 인덱스 생성
+
+        Post.objects.filter(owner=self.users[0]).delete()
+        for tag in Tag.objects.annotate(posts_count=Coalesce('stat__posts_count', 0)):
+            self.assertEqual(tag.posts_count, Post.objects.filter(tags=tag).count(), tag.name)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        post_ids = list(Post.objects.filter(tags=self.tag).order_by('-id').values_list('id', flat=True))
+        self.assertEqual([post_res['id'] for post_res in response.data['results']], post_ids)
+
+    def test_autocomplete_tag(self):
+        """검색어로 시작하는 태그 자동완성 (사용 횟수 순)"""
+        tag_index.build()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/tags/autocomplete?name=Dj')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        self.assertEqual([tag['name'] for tag in response.data], ['django', 'django rest framework'])
+        for tag in response.data:
+            self.assertEqual(tag['posts_count'], Post.objects.filter(tags=tag['id']).count())
+
+        response = self.client.get('/api/tags/autocomplete', {'name': 'python p', 'limit': 1})
+        self.assertEqual([tag['name'] for tag in response.data], ['python programming'])
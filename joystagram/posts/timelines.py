@@ -0,0 +1,84 @@
+from django.apps import apps
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from core.indexes import IDIndex
+
+# 유저별 홈 타임라인: 자신과 팔로우하는 유저들의 게시글 id
+timeline = IDIndex('timeline', settings.TIMELINE_MAX_LENGTH, settings.TIMELINE_TIMEOUT)
+
+# 팔로워가 많아 fan-out 하지 않고 읽을 때 가져오는(pull) 유저 id
+CELEBRITIES_KEY = 'timeline:celebrities'
+
+
+def is_celebrity(user):
+    """
+    팔로워 수가 TIMELINE_CELEBRITY_THRESHOLD 이상인 유저
+    한 번 celebrity 가 되면 계속 pull (그 전 게시글은 push 되어 있고 읽을 때 중복 제거)
+    """
+    threshold = settings.TIMELINE_CELEBRITY_THRESHOLD
+    if threshold is None:
+        return False
+    redis = get_redis_connection('default')
+    if redis.sismember(CELEBRITIES_KEY, user.id):
+        return True
+    # 팔로워를 threshold 개까지만 확인
+    if user.followers.values('id')[threshold - 1:threshold].exists():
+        redis.sadd(CELEBRITIES_KEY, user.id)
+        return True
+    return False
+
+
+def push_post(post):
+    """
+    새 게시글을 작성자와 팔로워들의 타임라인에 추가 (fan-out on write)
+    celebrity 의 게시글은 작성자 타임라인에만 추가
+    """
+    timeline.push([post.owner_id], post.id)
+    if is_celebrity(post.owner):
+        return
+    follower_ids = post.owner.followers.values_list('owner_id', flat=True).iterator()
+    timeline.push(follower_ids, post.id)
+
+
+def remove_post(owner_id, post_id):
+    """
+    삭제된 게시글을 작성자와 팔로워들의 타임라인에서 제거
+    작성자 탈퇴(cascade)로 팔로우가 먼저 지워진 타임라인은 읽을 때 제거 (PostViewSet.filter_queryset)
+    """
+    Follow = apps.get_model('relationships.Follow')
+    follower_ids = Follow.objects.filter(to_user_id=owner_id).values_list('owner_id', flat=True).iterator()
+    timeline.remove([owner_id], post_id)
+    timeline.remove(follower_ids, post_id)
+
+
+def read(user, window, loader):
+    """
+    타임라인(push)과 팔로우하는 celebrity 의 게시글(pull)을 합친 window 범위의 id 리스트
+    타임라인이 범위를 다 담지 못하면 None
+    """
+    post_ids = timeline.read(user.id, window, loader)
+    if post_ids is None:
+        return None
+
+    celebrity_ids = get_redis_connection('default').smembers(CELEBRITIES_KEY)
+    if not celebrity_ids:
+        return post_ids
+    followed_ids = user.followings.filter(to_user_id__in=[int(pk) for pk in celebrity_ids]). \
+        values_list('to_user_id', flat=True)
+    followed_ids = list(followed_ids)
+    if not followed_ids:
+        return post_ids
+
+    position, reverse, count = window
+    pull_qs = apps.get_model('posts.Post').objects.filter(owner_id__in=followed_ids)
+    if reverse:
+        if position is not None:
+            pull_qs = pull_qs.filter(id__gt=position)
+        pull_qs = pull_qs.order_by('id')
+    else:
+        if position is not None:
+            pull_qs = pull_qs.filter(id__lt=position)
+        pull_qs = pull_qs.order_by('-id')
+    merged = set(post_ids) | set(pull_qs.values_list('id', flat=True)[:count])
+    return sorted(merged, reverse=not reverse)[:count]
@@ -1,20 +1,61 @@
 from django.db.models import Q
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from rest_framework import mixins
+from rest_framework.decorators import action
 from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from taggit.models import Tag
 
+from core.counters import get_counters
 from core.permissions import IsOwnerOrAuthenticatedReadOnly
 from likes.models import PostLike
+from posts import timelines
+from posts.indexes import tag_posts
 from posts.models import Post
+from posts.search import tag_index
 from posts.serializers import PostSerializer, PostListSerializer, TagListSerializer
 from relationships.models import Follow
 
 
-class PostViewSet(mixins.CreateModelMixin,
+POST_COUNTER_FIELDS = ('likes_count', 'comments_count')
+
+
+class IndexRefillMixin:
+    """
+    인덱스(core.indexes)에서 읽은 id 로 조회한 페이지에 삭제된 게시글 id 가 빠져 있으면
+    인덱스에서 제거하고 이번에는 DB 에서 다시 조회 (존재 확인 쿼리 없이 조회한 페이지로 판단)
+    """
+    # filter_queryset 에서 인덱스로 읽은 id, 인덱스를 쓰지 않았으면 None
+    index_ids = None
+    use_index = True
+
+    def discard_index_ids(self, stale_ids):
+        raise NotImplementedError
+
+    def get_stale_ids(self, page):
+        if self.index_ids is None:
+            return set()
+        paginator = self.paginator
+        reverse = paginator.cursor is not None and paginator.cursor.reverse
+        if paginator.has_previous if reverse else paginator.has_next:
+            # 다음 row 까지 가져왔으면 범위의 id 가 모두 있음
+            return set()
+        return set(self.index_ids) - {post.id for post in page}
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        stale_ids = self.get_stale_ids(page)
+        if stale_ids:
+            self.discard_index_ids(stale_ids)
+            self.use_index = False
+            page = super().paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return page
+
+
+class PostViewSet(IndexRefillMixin,
+                  mixins.CreateModelMixin,
                   mixins.UpdateModelMixin,
                   mixins.DestroyModelMixin,
                   mixins.ListModelMixin,
@@ -36,15 +77,34 @@ class PostViewSet(mixins.CreateModelMixin,
         return super().get_serializer_class()
 
     def filter_queryset(self, queryset):
-        """자신과 자신이 팔로우하는 유저들의 스토리(등록시간 24시간 이내)"""
-
+        """
+        자신과 자신이 팔로우하는 유저들의 게시글
+        타임라인(+celebrity 게시글)에 현재 페이지 범위가 있으면 그 id 들로만 조회
+        삭제된 게시글 id 가 남아 있으면 페이지를 다 채우지 못하므로 제거하고 이번에는 DB 에서 조회 (IndexRefillMixin)
+        """
         if self.action == 'list':
-            queryset = queryset.filter(
-                Q(owner_id__in=Follow.objects.filter(owner=self.request.user).values('to_user_id')) |
-                Q(owner=self.request.user)
-            )
+            post_ids = None
+            if self.use_index:
+                window = self.paginator.get_cursor_window(self.request)
+                post_ids = timelines.read(self.request.user, window, self.load_timeline)
+            self.index_ids = post_ids
+            if post_ids is None:
+                queryset = queryset.filter(self.get_feed_filter())
+            else:
+                queryset = queryset.filter(id__in=post_ids)
         return super().filter_queryset(queryset)
 
+    def get_feed_filter(self):
+        return Q(owner_id__in=Follow.objects.filter(owner=self.request.user).values('to_user_id')) | \
+               Q(owner=self.request.user)
+
+    def load_timeline(self, size):
+        """타임라인 생성용 최신 게시글 id"""
+        return Post.objects.filter(self.get_feed_filter()).order_by('-id').values_list('id', flat=True)[:size]
+
+    def discard_index_ids(self, stale_ids):
+        timelines.timeline.discard(self.request.user.id, stale_ids)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -55,33 +115,78 @@ class PostViewSet(mixins.CreateModelMixin,
         if self.request.user.is_authenticated:
             like_qs = PostLike.objects.filter(owner=self.request.user, post__in=page)
             self.like_id_dict = {like.post_id: like.id for like in like_qs}
+
+        # 좋아요, 댓글 갯수 주입
+        self.counter_dict = get_counters(page, POST_COUNTER_FIELDS)
         return page
 
 
 class TagViewSet(mixins.ListModelMixin, GenericViewSet):
-    """query parameter 검색어로 태그 검색"""
-    queryset = Tag.objects.all().prefetch_related('taggit_taggeditem_items')
+    """
+    query parameter 검색어로 태그 검색
+    name__icontains 는 UPPER(name) trigram 인덱스 사용 (posts 0013 마이그레이션)
+    """
+    queryset = Tag.objects.annotate(posts_count=Coalesce('stat__posts_count', 0))
     serializer_class = TagListSerializer
 
-    @method_decorator(cache_page(60))
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
-
     def filter_queryset(self, queryset):
         name = self.request.query_params.get('name')
         if not name:
             raise ParseError('query parameter required: name not supplied')
         return super().filter_queryset(queryset).filter(name__icontains=name)
 
+    @action(detail=False)
+    def autocomplete(self, request, *args, **kwargs):
+        """
+        검색어로 시작하는 태그를 사용 횟수 순으로 (메모리 인덱스, DB 조회 없음)
+        GET /api/tags/autocomplete?name=
+        """
+        name = request.query_params.get('name')
+        if not name:
+            raise ParseError('query parameter required: name not supplied')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            raise ParseError('query parameter limit must be an integer')
+        return Response([entry._asdict() for entry in tag_index.search(name, limit)])
+
 
-class TaggedPostViewSet(mixins.ListModelMixin, GenericViewSet):
+class TaggedPostViewSet(IndexRefillMixin, mixins.ListModelMixin, GenericViewSet):
     """nested tag_pk로 해당 태그를 가진 포스트 검색"""
     queryset = Post.objects.all()
     serializer_class = PostListSerializer
 
     def filter_queryset(self, queryset):
-        return super().filter_queryset(queryset).filter(tags=self.kwargs.get('tag_pk')). \
-            select_related('owner__profile').prefetch_related('photos', 'tags').distinct()
+        """
+        태그별 게시글 인덱스에 현재 페이지 범위가 있으면 그 id 들로만 조회
+        (태그된 게시글은 중복될 수 없으므로 distinct 없이)
+        삭제된 게시글 id 가 남아 있으면 제거하고 이번에는 DB 에서 조회 (IndexRefillMixin)
+        """
+        tag_pk = int(self.kwargs.get('tag_pk'))
+        post_ids = None
+        if self.use_index:
+            window = self.paginator.get_cursor_window(self.request)
+            post_ids = tag_posts.read(tag_pk, window, self.load_tag_posts)
+        self.index_ids = post_ids
+        if post_ids is None:
+            queryset = queryset.filter(tags=tag_pk)
+        else:
+            queryset = queryset.filter(id__in=post_ids)
+        return super().filter_queryset(queryset).select_related('owner__profile').prefetch_related('photos', 'tags')
+
+    def discard_index_ids(self, stale_ids):
+        tag_posts.discard(int(self.kwargs.get('tag_pk')), stale_ids)
+
+    def load_tag_posts(self, size):
+        """태그별 게시글 인덱스 생성용 최신 게시글 id"""
+        return Post.objects.filter(tags=self.kwargs.get('tag_pk')).order_by('-id').values_list('id', flat=True)[:size]
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        # 좋아요, 댓글 갯수 주입
+        self.counter_dict = get_counters(page, POST_COUNTER_FIELDS)
+        return page
 
     def list(self, request, *args, **kwargs):
         tag_pk = self.kwargs.get('tag_pk')
@@ -0,0 +1,58 @@
+"""
+팔로우 여부 캐시
+
+유저별 Redis hash (follows:{owner_id}) 에 {to_user_id: follow_id} 저장, 팔로우 안 한 유저는 0
+페이지에 나온 유저들만 HMGET 하고 없는 필드만 DB 에서 채운다 (전체 팔로우 목록은 읽지 않음)
+"""
+from django.apps import apps
+from django.conf import settings
+from django_redis import get_redis_connection
+
+NOT_FOLLOWING = 0
+
+
+def get_key(owner_id):
+    return f'follows:{owner_id}'
+
+
+def get_follow_ids(owner_id, to_user_ids):
+    """to_user_ids 중 owner 가 팔로우하는 유저의 {to_user_id: follow_id}"""
+    to_user_ids = list(to_user_ids)
+    if not to_user_ids:
+        return {}
+    # relationships.models 에서 import 하므로 모델은 실행 시점에
+    Follow = apps.get_model('relationships.Follow')
+    if not settings.FOLLOW_CACHE_ENABLED:
+        return dict(Follow.objects.filter(owner_id=owner_id, to_user_id__in=to_user_ids).
+                    values_list('to_user_id', 'id'))
+
+    redis = get_redis_connection('default')
+    key = get_key(owner_id)
+    cached = dict(zip(to_user_ids, redis.hmget(key, to_user_ids)))
+    missing = [to_user_id for to_user_id, follow_id in cached.items() if follow_id is None]
+
+    follow_id_dict = {to_user_id: int(follow_id) for to_user_id, follow_id in cached.items()
+                      if follow_id is not None and int(follow_id) != NOT_FOLLOWING}
+    if missing:
+        loaded = dict(Follow.objects.filter(owner_id=owner_id, to_user_id__in=missing).
+                      values_list('to_user_id', 'id'))
+        follow_id_dict.update(loaded)
+        # 채우는 중에 생긴 팔로우, 언팔로우(set_follow)를 덮어쓰지 않도록 HSETNX
+        with redis.pipeline(transaction=False) as pipe:
+            for to_user_id in missing:
+                pipe.hsetnx(key, to_user_id, loaded.get(to_user_id, NOT_FOLLOWING))
+            pipe.expire(key, settings.FOLLOW_CACHE_TIMEOUT)
+            pipe.execute()
+    return follow_id_dict
+
+
+def set_follow(owner_id, to_user_id, follow_id=NOT_FOLLOWING):
+    """팔로우 생성(follow_id), 삭제(NOT_FOLLOWING) 시 캐시 갱신"""
+    if not settings.FOLLOW_CACHE_ENABLED:
+        return
+    redis = get_redis_connection('default')
+    key = get_key(owner_id)
+    with redis.pipeline(transaction=False) as pipe:
+        pipe.hset(key, to_user_id, follow_id)
+        pipe.expire(key, settings.FOLLOW_CACHE_TIMEOUT)
+        pipe.execute()
@@ -1,14 +1,12 @@
-from time import sleep
-
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django_lifecycle import hook, BEFORE_SAVE, AFTER_SAVE, AFTER_DELETE
+from django.db.models.functions import Greatest
 from model_utils.models import TimeStampedModel
-from redlock import Redlock
 
-from users.models import User
+from posts.timelines import timeline
+from relationships import caches
+from story import trays
+from users.models import Profile
 
 
 class Follow(TimeStampedModel):
@@ -18,45 +16,33 @@ class Follow(TimeStampedModel):
     class Meta:
         unique_together = ['owner', 'to_user']
 
-    def redlock(self):
-        return Redlock([{'host': 'localhost', 'port': 6379, 'db': 0}], retry_count=5)
-
-    # # django-lifecycle 사용
-    # @hook(AFTER_SAVE)
-    # def on_create(self):
-    #     dlm = self.redlock()
-    #     resource = f'Follow:{self.id}'
-    #
-    #     my_lock = dlm.lock(resource, 10000)
-    #     if my_lock:
-    #         self.owner.profile.followings_count += 1
-    #         self.to_user.profile.followers_count += 1
-    #         self.owner.profile.save()
-    #         self.to_user.profile.save()
-    #         dlm.unlock(my_lock)
-    #
-    # @hook(AFTER_DELETE)
-    # def on_create(self):
-    #     dlm = self.redlock()
-    #     resource = f'Follow:{self.id}'
-    #
-    #     my_lock = dlm.lock(resource, 10000)
-    #     if my_lock:
-    #         self.owner.profile.followings_count -= 1
-    #         self.to_user.profile.followers_count -= 1
-    #         self.owner.profile.save()
-    #         self.to_user.profile.save()
-    #         dlm.unlock(my_lock)
-
-# # 시그널 사용
-# @receiver(post_save, sender=Follow)
-# def update_follow_count(sender, instance=None, **kwargs):
-#     dlm = redlock()
-#     resource = f'Follow:{instance.id}'
-#
-#     my_lock = dlm.lock(resource, 10000)
-#     if my_lock:
-#         instance.owner.profile.followers_count += 1
-#         instance.owner.profile.save()
-#
-#         dlm.unlock(my_lock)
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        팔로잉, 팔로워 갯수 + 1
+        팔로우한 유저의 게시글, 스토리가 보이도록 타임라인, 스토리 트레이 초기화, 팔로우 여부 캐시 갱신
+        """
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(force_insert, force_update, using, update_fields)
+            if adding:
+                Profile.objects.filter(user_id=self.owner_id).update(followings_count=F('followings_count') + 1)
+                Profile.objects.filter(user_id=self.to_user_id).update(followers_count=F('followers_count') + 1)
+        timeline.delete(self.owner_id)
+        trays.delete(self.owner_id)
+        caches.set_follow(self.owner_id, self.to_user_id, self.id)
+
+    def delete(self, using=None, keep_parents=False):
+        """
+        팔로잉, 팔로워 갯수 - 1
+        언팔로우한 유저의 게시글, 스토리가 빠지도록 타임라인, 스토리 트레이 초기화, 팔로우 여부 캐시 갱신
+        """
+        with transaction.atomic():
+            result = super().delete(using, keep_parents)
+            Profile.objects.filter(user_id=self.owner_id). \
+                update(followings_count=Greatest(F('followings_count') - 1, 0))
+            Profile.objects.filter(user_id=self.to_user_id). \
+                update(followers_count=Greatest(F('followers_count') - 1, 0))
+        timeline.delete(self.owner_id)
+        trays.delete(self.owner_id)
+        caches.set_follow(self.owner_id, self.to_user_id)
+        return result
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound
+
+from core.images import ImageMetaField, ImageVariantsField
 from relationships.models import Follow
 from users.models import User
 from users.serializers import SimpleProfileSerializer
@@ -31,11 +33,13 @@ class UserListSerializer(serializers.ModelSerializer):
     nickname = serializers.CharField(max_length=20, source='profile.nickname')
     introduce = serializers.CharField(default='', source='profile.introduce')
     img = serializers.ImageField(read_only=True, source='profile.img')
+    img_variants = ImageVariantsField(source='profile')
+    img_meta = ImageMetaField(source='profile')
     follow_id = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ('id', 'nickname', 'introduce', 'img', 'follow_id')
+        fields = ('id', 'nickname', 'introduce', 'img', 'img_variants', 'img_meta', 'follow_id')
 
     def get_follow_id(self, obj):
         follow_id_dict = getattr(self.context['view'], 'follow_id_dict', {})
@@ -1,8 +1,9 @@
+from django.core.cache import cache
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
 from relationships.models import Follow
-from users.models import User
+from users.models import User, Profile
 
 
 class FollowTestCase(APITestCase):
@@ -47,6 +48,19 @@ class FollowTestCase(APITestCase):
         response = self.client.delete(f'/api/follows/{follow.id}')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, response.data)
 
+    def test_should_update_follow_counts(self):
+        """팔로우 생성, 삭제 시 프로필의 팔로잉, 팔로워 갯수 갱신"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Profile.objects.get(user=self.user).followings_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.to_user).followers_count, 1)
+
+        response = self.client.delete(f'/api/follows/{response.data["id"]}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, response.data)
+        self.assertEqual(Profile.objects.get(user=self.user).followings_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.to_user).followers_count, 0)
+
     def test_should_denied_delete401(self):
         """삭제-인증 필요"""
         follow = baker.make('relationships.Follow', owner=self.user, to_user=self.to_user)
@@ -58,10 +72,12 @@ class FollowListTestCase(APITestCase):
     """팔로우 리스트 테스트"""
 
     def setUp(self) -> None:
+        cache.clear()
         users = baker.make('users.User', _quantity=4)
         for user in users:
             baker.make('users.Profile', user=user)
 
+        self.users = users
         self.user = users[0]
         baker.make('relationships.Follow', owner=self.user, to_user=users[1])
         baker.make('relationships.Follow', owner=self.user, to_user=users[2])
@@ -103,6 +119,21 @@ class FollowListTestCase(APITestCase):
         for user_res, user_obj in zip(res['results'], user_list):
             self.follow_test(user_res, user_obj, False)
 
+    def test_should_update_follow_id(self):
+        """팔로우, 언팔로우 후 리스트의 follow_id"""
+        url = f'/api/users/{self.user.id}/followers'
+        self.client.get(url)
+
+        follow = baker.make('relationships.Follow', owner=self.user, to_user=self.users[3])
+        Follow.objects.get(owner=self.user, to_user=self.users[1]).delete()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        follow_id_dict = {user_res['id']: user_res['follow_id'] for user_res in response.data['results']}
+        self.assertEqual(follow_id_dict[self.users[3].id], follow.id)
+        self.assertIsNone(follow_id_dict[self.users[1].id])
+        self.assertIsNotNone(follow_id_dict[self.users[2].id])
+
     def follow_test(self, user_res, user_obj, is_follower):
         self.assertEqual(user_res['id'], user_obj.id)
         self.assertTrue('img' in user_res)
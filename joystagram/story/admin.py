@@ -1,13 +1,20 @@
 from django.contrib import admin
 
-from story.models import StoryCheck, Story
+from story.models import StoryCheck, Story, ArchivedStory
 
 
 @admin.register(Story)
 class StoryAdmin(admin.ModelAdmin):
-    list_display = ['id', 'owner', 'duration', 'created']
+    list_display = ['id', 'owner', 'duration', 'img_width', 'img_height', 'img_size', 'created']
+    readonly_fields = ['img_width', 'img_height', 'img_size', 'img_placeholder']
 
 
 @admin.register(StoryCheck)
 class StoryCheckAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'story', 'created']
+
+
+@admin.register(ArchivedStory)
+class ArchivedStoryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'read_users_count', 'created', 'archived']
+    readonly_fields = ['img_width', 'img_height', 'img_size', 'img_placeholder']
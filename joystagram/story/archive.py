@@ -0,0 +1,72 @@
+"""
+지난 스토리 보관
+
+24시간(ACTIVE_PERIOD)이 지난 스토리와 읽음 기록을 batch_size 개씩 ArchivedStory, ArchivedStoryCheck 로 옮기고 Story 에서 삭제
+Story, StoryCheck 테이블에는 보이는 스토리만 남는다 (archive_stories 커맨드)
+이미지 파일은 보관된 스토리가 참조를 이어받아(core.media) 지워지지 않음
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from core import media
+from core.counters import get_deltas
+from story import caches, checks
+from story.models import ArchivedStory, ArchivedStoryCheck, Story, StoryCheck
+from story.trays import ACTIVE_PERIOD
+
+
+def archive_batch(cutoff, batch_size):
+    """cutoff 이전 스토리 batch_size 개 보관, 보관한 id 리스트 리턴"""
+    with transaction.atomic():
+        # 여러 worker 가 같은 스토리를 옮기지 않도록
+        stories = list(Story.objects.filter(created__lt=cutoff).order_by('id').
+                       select_for_update(skip_locked=True)[:batch_size])
+        if not stories:
+            return []
+        story_ids = [story.id for story in stories]
+        deltas = get_deltas(Story, story_ids, 'read_users_count')
+        archived = [
+            ArchivedStory(
+                id=story.id,
+                owner_id=story.owner_id,
+                content=story.content,
+                img=story.img.name,
+                img_width=story.img_width,
+                img_height=story.img_height,
+                img_size=story.img_size,
+                img_placeholder=story.img_placeholder,
+                variants_source=story.variants_source,
+                duration=story.duration,
+                read_users_count=story.read_users_count + deltas.get(story.id, 0),
+                created=story.created,
+            )
+            for story in stories
+        ]
+        ArchivedStory.objects.bulk_create(archived)
+        # 스토리 삭제(참조 - 1) 전에 보관된 스토리의 참조 + 1
+        media.acquire_created(archived)
+        story_checks = StoryCheck.objects.filter(story_id__in=story_ids).values_list('story_id', 'user_id', 'created')
+        ArchivedStoryCheck.objects.bulk_create(
+            [ArchivedStoryCheck(story_id=story_id, user_id=user_id, created=created)
+             for story_id, user_id, created in story_checks.iterator()],
+            batch_size=1000,
+        )
+        Story.objects.filter(id__in=story_ids).delete()
+    caches.invalidate(story_ids)
+    checks.delete(story_ids)
+    return story_ids
+
+
+def archive(batch_size=500, now=None):
+    """
+    지난 스토리 전부 보관, 보관한 스토리 수 리턴
+    아직 저장 안 된 읽음 기록을 먼저 StoryCheck 로 저장
+    """
+    checks.flush()
+    cutoff = (now or timezone.now()) - ACTIVE_PERIOD
+    archived = 0
+    while True:
+        story_ids = archive_batch(cutoff, batch_size)
+        if not story_ids:
+            return archived
+        archived += len(story_ids)
@@ -0,0 +1,50 @@
+"""
+스토리 조회 캐시
+
+StorySerializer 로 직렬화한 결과(작성자 프로필 포함)를 권한과 상관없이 스토리마다 한 번만 저장
+    story:{story_id}  {'owner_id', 'created', 'data'}
+조회 권한(24시간 이내, 자신 또는 팔로우하는 유저)은 매번 payload 의 owner_id, created 와 팔로우 여부 캐시로 검사
+읽은 유저 수는 자주 바뀌므로 payload 에 두지 않고 조회할 때 채운다 (story.checks)
+스토리 수정, 삭제, 변형 이미지 생성, 작성자 프로필 수정 시 삭제
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from relationships import caches as follow_caches
+from story.trays import ACTIVE_PERIOD
+
+
+def get_key(story_id):
+    return f'story:{story_id}'
+
+
+def get_payload(story_id):
+    return cache.get(get_key(story_id))
+
+
+def set_payload(story, data):
+    payload = {'owner_id': story.owner_id, 'created': story.created, 'data': dict(data)}
+    cache.set(get_key(story.id), payload, settings.STORY_CACHE_TIMEOUT)
+    return payload
+
+
+def can_view(user_id, payload):
+    """StoryViewSet.filter_queryset 과 같은 조건 (DB 조회 없이)"""
+    now = timezone.now()
+    if not now - ACTIVE_PERIOD <= payload['created'] <= now:
+        return False
+    owner_id = payload['owner_id']
+    return owner_id == user_id or owner_id in follow_caches.get_follow_ids(user_id, [owner_id])
+
+
+def invalidate(story_ids):
+    cache.delete_many([get_key(story_id) for story_id in story_ids])
+
+
+def invalidate_owner(owner_id):
+    """작성자 프로필이 바뀌면 보이는 스토리들의 payload 삭제"""
+    Story = apps.get_model('story.Story')
+    invalidate(Story.objects.filter(owner_id=owner_id, created__gte=timezone.now() - ACTIVE_PERIOD).
+               values_list('id', flat=True))
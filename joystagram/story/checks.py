@@ -0,0 +1,266 @@
+"""
+스토리 읽음 기록 (write-behind)
+
+조회할 때 StoryCheck 를 바로 만들지 않고 Redis 에 기록
+    story_views:{story_id}  스토리를 본 유저 id sorted set, score: 처음 본 시간 (DB 의 StoryCheck 까지 포함)
+    story_checks:pending    아직 DB 에 없는 '{story_id}:{user_id}:{본 시간}'
+    story_checks:processing:{worker}  flush 가 꺼내서 저장 중인 기록 (커밋 후 삭제)
+처음 본 유저면 read_users_count 카운터(core.counters) + 1 (DB 보관용, 조회할 때는 viewers 크기)
+flush_story_checks 커맨드가 batch_size 개씩 꺼내 bulk_create 한 번으로 저장
+꺼낸 기록은 worker 별 processing set 으로 옮겨 두므로 저장 중 프로세스가 죽어도 PROCESSING_TIMEOUT 뒤 다시 pending 으로
+읽은 유저 리스트는 본 시간 최신순, 다음 페이지는 이전 페이지 마지막 유저의 순위(ZREVRANK) 다음부터 (JOIN, OFFSET 없음)
+"""
+import base64
+import binascii
+import json
+import time
+import uuid
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework.exceptions import NotFound
+
+from core.counters import incr_counter
+
+PENDING_KEY = 'story_checks:pending'
+
+# 저장 중인 processing set 키들 (score: 꺼낸 시간)
+PROCESSING_KEY = 'story_checks:processing'
+
+# 이 시간이 지나도 남은 processing set 은 죽은 worker 의 것으로 보고 다시 pending 으로
+PROCESSING_TIMEOUT = 600
+
+# viewers 를 DB 에서 만들었다는 표시 (본 유저가 없어도 키가 남도록, score 0 이라 항상 마지막)
+SENTINEL = 0
+
+LOAD_CHUNK_SIZE = 1000
+
+# 만들어진 viewers 에만 추가, 처음 본 유저면 pending 에도 추가
+# 리턴: 1 처음 봄, 0 이미 봄, -1 viewers 없음
+RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local added = redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1])
+if added == 1 then
+    redis.call('SADD', KEYS[2], ARGV[3])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return added
+"""
+
+# ARGV[1](이전 페이지 마지막 유저) 다음부터 ARGV[2] 개, 본 시간 최신순 [user_id, score, ...]
+# 리턴: -1 viewers 없음, -2 마지막 유저가 viewers 에 없음
+PAGE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local start = 0
+if ARGV[1] ~= '' then
+    local rank = redis.call('ZREVRANK', KEYS[1], ARGV[1])
+    if not rank then
+        return -2
+    end
+    start = rank + 1
+end
+return redis.call('ZREVRANGE', KEYS[1], start, start + tonumber(ARGV[2]) - 1, 'WITHSCORES')
+"""
+
+# pending 에서 ARGV[1] 개 꺼내 processing set(KEYS[2]) 으로 옮김
+TAKE_SCRIPT = """
+local members = redis.call('SPOP', KEYS[1], ARGV[1])
+if #members > 0 then
+    redis.call('SADD', KEYS[2], unpack(members))
+    redis.call('ZADD', KEYS[3], ARGV[2], KEYS[2])
+end
+return members
+"""
+
+# processing set(KEYS[2]) 을 pending 으로 되돌림
+REQUEUE_SCRIPT = """
+redis.call('SUNIONSTORE', KEYS[1], KEYS[1], KEYS[2])
+redis.call('DEL', KEYS[2])
+redis.call('ZREM', KEYS[3], KEYS[2])
+"""
+
+_scripts = {}
+
+
+def get_redis():
+    return get_redis_connection('default')
+
+
+def get_script(script):
+    if script not in _scripts:
+        _scripts[script] = get_redis().register_script(script)
+    return _scripts[script]
+
+
+def get_viewers_key(story_id):
+    return f'story_views:{story_id}'
+
+
+def load_viewers(story_id):
+    """DB 의 StoryCheck 로 viewers 만들기"""
+    StoryCheck = apps.get_model('story.StoryCheck')
+    rows = StoryCheck.objects.filter(story_id=story_id).values_list('user_id', 'created')
+    key = get_viewers_key(story_id)
+    with get_redis().pipeline() as pipe:
+        pipe.zadd(key, {SENTINEL: SENTINEL})
+        scores = {}
+        for user_id, created in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            scores[user_id] = created.timestamp()
+            if len(scores) >= LOAD_CHUNK_SIZE:
+                pipe.zadd(key, scores)
+                scores = {}
+        if scores:
+            pipe.zadd(key, scores)
+        pipe.expire(key, settings.STORY_VIEWERS_TIMEOUT)
+        pipe.execute()
+
+
+def record(user_id, story_id):
+    """user 가 story 를 봤음, 처음 봤으면 True"""
+    viewed = timezone.now().timestamp()
+    keys = [get_viewers_key(story_id), PENDING_KEY]
+    args = [user_id, viewed, f'{story_id}:{user_id}:{viewed}', settings.STORY_VIEWERS_TIMEOUT]
+    script = get_script(RECORD_SCRIPT)
+    added = script(keys=keys, args=args)
+    if added == -1:
+        load_viewers(story_id)
+        added = script(keys=keys, args=args)
+    if added == 1:
+        incr_counter(apps.get_model('story.Story'), story_id, 'read_users_count', 1)
+    return added == 1
+
+
+def count(story_id):
+    """읽은 유저 수 (viewers 크기 - SENTINEL, 아직 저장 안 된 기록 포함)"""
+    key = get_viewers_key(story_id)
+    size = get_redis().zcard(key)
+    if not size:
+        load_viewers(story_id)
+        size = get_redis().zcard(key)
+    return size - 1
+
+
+def read_viewers(story_id, after=None, size=15):
+    """
+    읽은 유저 [(user_id, 본 시간(datetime))] 본 시간 최신순 size 개와 다음 페이지가 있는지
+    after: 이전 페이지 마지막 유저 id, viewers 에 없으면 None 리턴
+    """
+    keys, args = [get_viewers_key(story_id)], ['' if after is None else after, size + 1]
+    script = get_script(PAGE_SCRIPT)
+    rows = script(keys=keys, args=args)
+    if rows == -1:
+        load_viewers(story_id)
+        rows = script(keys=keys, args=args)
+    if rows == -2:
+        return None
+    viewers = [(int(member), datetime.fromtimestamp(float(score), tz=timezone.utc))
+               for member, score in zip(rows[::2], rows[1::2]) if int(member) != SENTINEL]
+    return viewers[:size], len(viewers) > size
+
+
+def encode_cursor(user_id):
+    return base64.urlsafe_b64encode(json.dumps(user_id).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except (binascii.Error, ValueError, TypeError):
+        raise NotFound('Invalid cursor')
+
+
+def get_viewed(user_id, story_ids):
+    """{story_id: user 가 봤는지} viewers 가 없는 스토리만 DB 조회"""
+    story_ids = list(story_ids)
+    with get_redis().pipeline(transaction=False) as pipe:
+        for story_id in story_ids:
+            pipe.exists(get_viewers_key(story_id))
+            pipe.zscore(get_viewers_key(story_id), user_id)
+        results = pipe.execute()
+
+    viewed, missing = {}, []
+    for story_id, exists, score in zip(story_ids, results[::2], results[1::2]):
+        if exists:
+            viewed[story_id] = score is not None
+        else:
+            missing.append(story_id)
+    if missing:
+        StoryCheck = apps.get_model('story.StoryCheck')
+        checked = set(StoryCheck.objects.filter(user_id=user_id, story_id__in=missing).
+                      values_list('story_id', flat=True))
+        viewed.update({story_id: story_id in checked for story_id in missing})
+    return viewed
+
+
+def delete(story_ids):
+    keys = [get_viewers_key(story_id) for story_id in story_ids]
+    if keys:
+        get_redis().delete(*keys)
+
+
+def parse_pending(member, now):
+    """'{story_id}:{user_id}:{본 시간}' -> (story_id, user_id, 본 시간), 본 시간이 없는 기록은 now"""
+    story_id, user_id, *viewed = member.decode().split(':')
+    viewed = datetime.fromtimestamp(float(viewed[0]), tz=timezone.utc) if viewed else now
+    return int(story_id), int(user_id), viewed
+
+
+def take(processing_key, batch_size):
+    keys = [PENDING_KEY, processing_key, PROCESSING_KEY]
+    return get_script(TAKE_SCRIPT)(keys=keys, args=[batch_size, time.time()])
+
+
+def requeue(processing_key):
+    get_script(REQUEUE_SCRIPT)(keys=[PENDING_KEY, processing_key, PROCESSING_KEY])
+
+
+def requeue_abandoned(now=None):
+    """PROCESSING_TIMEOUT 이 지난 processing set 들을 pending 으로 (이미 저장된 기록은 ignore_conflicts)"""
+    deadline = (now or time.time()) - PROCESSING_TIMEOUT
+    for processing_key in get_redis().zrangebyscore(PROCESSING_KEY, '-inf', deadline):
+        requeue(processing_key.decode())
+
+
+def flush(batch_size=1000):
+    """쌓인 읽음 기록을 batch_size 개씩 bulk_create, 처리한 기록 수 리턴"""
+    Story = apps.get_model('story.Story')
+    StoryCheck = apps.get_model('story.StoryCheck')
+    User = apps.get_model('users.User')
+    redis = get_redis()
+    requeue_abandoned()
+    processing_key = f'{PROCESSING_KEY}:{uuid.uuid4().hex}'
+    flushed = 0
+    while True:
+        members = take(processing_key, batch_size)
+        if not members:
+            return flushed
+        now = timezone.now()
+        rows = [parse_pending(member, now) for member in members]
+        try:
+            # 그 사이 삭제된 스토리, 유저는 제외 (외래키 오류)
+            story_ids = set(Story.objects.filter(id__in={story_id for story_id, _, _ in rows}).
+                            values_list('id', flat=True))
+            user_ids = set(User.objects.filter(id__in={user_id for _, user_id, _ in rows}).
+                           values_list('id', flat=True))
+            StoryCheck.objects.bulk_create(
+                [StoryCheck(story_id=story_id, user_id=user_id, created=viewed) for story_id, user_id, viewed in rows
+                 if story_id in story_ids and user_id in user_ids],
+                ignore_conflicts=True,
+            )
+        except Exception:
+            # 실패한 기록은 다시 pending 으로
+            requeue(processing_key)
+            raise
+        # 저장된 뒤에 processing set 삭제
+        with redis.pipeline() as pipe:
+            pipe.delete(processing_key)
+            pipe.zrem(PROCESSING_KEY, processing_key)
+            pipe.execute()
+        flushed += len(members)
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management import BaseCommand
+
+from story import archive
+
+
+class Command(BaseCommand):
+    help = '24시간이 지난 스토리와 읽음 기록을 보관 테이블로 옮김'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=0,
+                            help='0 보다 크면 interval 초마다 계속 보관')
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive.archive(options['batch_size'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f'archived {archived} stories')
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
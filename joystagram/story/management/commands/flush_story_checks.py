@@ -0,0 +1,23 @@
+import time
+
+from django.core.management import BaseCommand
+
+from story import checks
+
+
+class Command(BaseCommand):
+    help = 'Redis 에 쌓인 스토리 읽음 기록을 StoryCheck 로 bulk 저장'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=float, default=0,
+                            help='0 보다 크면 interval 초마다 계속 저장')
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = checks.flush(options['batch_size'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f'flushed {flushed} story checks')
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.7 on 2020-08-12 02:45
+
+import core.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('story', '0009_alter_story_img'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='img_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='img_placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='img_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='img_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='story',
+            name='img',
+            field=core.media.ContentHashImageField(height_field='img_height', size_field='img_size', upload_to='story_img', width_field='img_width'),
+        ),
+    ]
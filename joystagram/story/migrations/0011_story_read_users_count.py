@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2020-08-13 06:18
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_read_users_count(apps, schema_editor):
+    Story = apps.get_model('story', 'Story')
+    StoryCheck = apps.get_model('story', 'StoryCheck')
+    counts = StoryCheck.objects.filter(story=OuterRef('pk')).order_by().values('story'). \
+        annotate(count=Count('*')).values('count')
+    Story.objects.update(read_users_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('story', '0010_story_img_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='read_users_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_read_users_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.0.7 on 2020-08-14 03:05
+
+import core.media
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('story', '0011_story_read_users_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['owner', '-created'], name='story_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['created'], name='story_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedStory',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField(blank=True, null=True)),
+                ('img', core.media.ContentHashImageField(height_field='img_height', size_field='img_size', upload_to='story_img', width_field='img_width')),
+                ('img_width', models.PositiveIntegerField(blank=True, null=True)),
+                ('img_height', models.PositiveIntegerField(blank=True, null=True)),
+                ('img_size', models.PositiveIntegerField(blank=True, null=True)),
+                ('img_placeholder', models.TextField(blank=True, default='')),
+                ('variants_source', models.CharField(blank=True, default='', max_length=100)),
+                ('duration', models.DurationField()),
+                ('read_users_count', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField()),
+                ('archived', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_stories', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedStoryCheck',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField()),
+                ('story', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='story_checks', to='story.ArchivedStory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'story')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedstory',
+            index=models.Index(fields=['owner', '-id'], name='archived_story_owner_idx'),
+        ),
+    ]
@@ -1,8 +1,14 @@
-from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from model_utils.models import TimeStampedModel
 
+from core import images, media
+from story import caches, checks, trays
+from users.models import Profile
 
+
+# 이전 마이그레이션에서 참조
 def story_img_path(instance, filename):
     return f'story_img/{instance.owner_id}/{filename}'
 
@@ -10,19 +16,74 @@ def story_img_path(instance, filename):
 class Story(TimeStampedModel):
     owner = models.ForeignKey('users.User', on_delete=models.CASCADE)
     content = models.TextField(blank=True, null=True)
-    img = models.ImageField(upload_to=story_img_path)
+    img = media.ContentHashImageField(upload_to='story_img', width_field='img_width', height_field='img_height',
+                                      size_field='img_size')
+    img_width = models.PositiveIntegerField(null=True, blank=True)
+    img_height = models.PositiveIntegerField(null=True, blank=True)
+    img_size = models.PositiveIntegerField(null=True, blank=True)
+    # 흐린 미리보기 data URI (core.images)
+    img_placeholder = models.TextField(blank=True, default='')
+    # 변형 이미지(core.images)를 만든 원본 이름
+    variants_source = models.CharField(max_length=100, blank=True, default='')
     duration = models.DurationField()
+    # 읽은 유저 수 (story.checks, core.counters 로 증가)
+    read_users_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # 24시간 이내 스토리 리스트(작성자, 등록 시간), 지난 스토리 보관(등록 시간)
+        indexes = [
+            models.Index(fields=['owner', '-created'], name='story_owner_created_idx'),
+            models.Index(fields=['created'], name='story_created_idx'),
+        ]
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         if self.id:
-            key = f'{self.id}story'
-            cache.delete(key)
+            caches.invalidate([self.id])
         super().save(force_insert, force_update, using, update_fields)
 
     def delete(self, using=None, keep_parents=False):
-        key = f'{self.id}story'
-        cache.delete(key)
-        return super().delete(using, keep_parents)
+        """스토리 트레이에서 최신 스토리 시간 갱신 또는 제거, 읽은 유저 set 삭제"""
+        story_id = self.id
+        caches.invalidate([story_id])
+        result = super().delete(using, keep_parents)
+        trays.remove_story(self)
+        checks.delete([story_id])
+        return result
+
+
+# 변형 이미지 생성(generate_variants) 전에 파일 참조(MediaFile row) 먼저
+media.track(Story)
+
+
+@receiver(post_save, sender=Story)
+def generate_story_img_variants(sender, instance, **kwargs):
+    """스토리 사진 변형 이미지 생성"""
+    images.generate_variants([instance])
+
+
+@receiver(post_save, sender=Story)
+def push_story_tray(sender, instance, created, **kwargs):
+    """작성자와 팔로워들의 스토리 트레이에 추가"""
+    if created:
+        trays.push_story(instance)
+
+
+@receiver(images.variants_ready, sender=Story)
+def invalidate_story_payload(sender, pk, **kwargs):
+    """변형 이미지 URL 이 보이도록 조회 캐시 삭제"""
+    caches.invalidate([pk])
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_owner_story_payloads(sender, instance, **kwargs):
+    """작성자 프로필이 바뀌면 조회 캐시 삭제"""
+    caches.invalidate_owner(instance.user_id)
+
+
+@receiver(images.variants_ready, sender=Profile)
+def invalidate_owner_story_payloads_for_img(sender, pk, **kwargs):
+    """작성자 프로필 사진 변형 이미지가 준비되면 조회 캐시 삭제"""
+    caches.invalidate_owner(Profile.objects.filter(pk=pk).values_list('user_id', flat=True).first())
 
 
 class StoryCheck(TimeStampedModel):
@@ -31,3 +92,38 @@ class StoryCheck(TimeStampedModel):
 
     class Meta:
         unique_together = ['user', 'story']
+
+
+class ArchivedStory(models.Model):
+    """24시간이 지나 보관된 스토리 (story.archive), id 는 원래 Story 의 id"""
+    id = models.IntegerField(primary_key=True)
+    owner = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='archived_stories')
+    content = models.TextField(blank=True, null=True)
+    img = media.ContentHashImageField(upload_to='story_img', width_field='img_width', height_field='img_height',
+                                      size_field='img_size')
+    img_width = models.PositiveIntegerField(null=True, blank=True)
+    img_height = models.PositiveIntegerField(null=True, blank=True)
+    img_size = models.PositiveIntegerField(null=True, blank=True)
+    img_placeholder = models.TextField(blank=True, default='')
+    variants_source = models.CharField(max_length=100, blank=True, default='')
+    duration = models.DurationField()
+    read_users_count = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # 작성자별 보관함 최신순
+        indexes = [models.Index(fields=['owner', '-id'], name='archived_story_owner_idx')]
+
+
+media.track(ArchivedStory)
+
+
+class ArchivedStoryCheck(models.Model):
+    """보관된 스토리의 읽음 기록"""
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    story = models.ForeignKey('story.ArchivedStory', on_delete=models.CASCADE, related_name='story_checks')
+    created = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'story']
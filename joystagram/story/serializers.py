@@ -1,30 +1,59 @@
 from rest_framework import serializers
 
-from story.models import Story
+from core.images import HeaderImageField, ImageMetaField, ImageVariantsField
+from story import checks
+from story.models import ArchivedStory, Story
 from users.serializers import SimpleProfileSerializer
 
 
 class StorySerializer(serializers.ModelSerializer):
     _duration = serializers.IntegerField(read_only=True, source='duration.seconds')
-    read_users_count = serializers.IntegerField(read_only=True, source='story_checks.count')  # 읽은 유저 수
+    read_users_count = serializers.SerializerMethodField()  # 읽은 유저 수
     owner = SimpleProfileSerializer(read_only=True)
+    img = HeaderImageField()
+    img_variants = ImageVariantsField()
+    img_meta = ImageMetaField()
 
     class Meta:
         model = Story
-        fields = ('id', 'owner', 'content', 'img', 'duration', '_duration', 'created', 'read_users_count')
+        fields = ('id', 'owner', 'content', 'img', 'img_variants', 'img_meta', 'duration', '_duration', 'created',
+                  'read_users_count')
         extra_kwargs = {'duration': {'write_only': True}}
 
+    def get_read_users_count(self, obj):
+        return checks.count(obj.id)
+
 
 class StoryListSerializer(serializers.ModelSerializer):
     _duration = serializers.IntegerField(source='duration.seconds')
     watched = serializers.SerializerMethodField()
     owner = SimpleProfileSerializer()
+    img_variants = ImageVariantsField()
+    img_meta = ImageMetaField()
 
     class Meta:
         model = Story
-        fields = ('id', 'content', 'img', '_duration', 'watched', 'owner', 'created')
+        fields = ('id', 'content', 'img', 'img_variants', 'img_meta', '_duration', 'watched', 'owner', 'created')
 
     def get_watched(self, obj):
         """이미 본 스토리인지: id 가 있으면 True"""
         story_check_dict = getattr(self.context['view'], 'story_check_dict', {})
         return story_check_dict.get(obj.id)
+
+
+class StoryTraySerializer(serializers.Serializer):
+    """스토리 트레이: 스토리가 있는 유저, 최신 스토리 시간, 다 봤는지"""
+    owner = SimpleProfileSerializer()
+    latest = serializers.DateTimeField()
+    seen = serializers.BooleanField()
+
+
+class ArchivedStorySerializer(serializers.ModelSerializer):
+    _duration = serializers.IntegerField(source='duration.seconds')
+    img_variants = ImageVariantsField()
+    img_meta = ImageMetaField()
+
+    class Meta:
+        model = ArchivedStory
+        fields = ('id', 'content', 'img', 'img_variants', 'img_meta', '_duration', 'read_users_count', 'created',
+                  'archived')
@@ -1,15 +1,21 @@
+import time
 from datetime import timedelta, datetime
+from unittest import mock
 
 import pytz
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db.models import Q
 from django.utils import timezone
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core.paginations import IDPagination
 from core.tests import TempFileMixin
 from relationships.models import Follow
-from story.models import StoryCheck, Story
+from story import archive, checks
+from story.models import ArchivedStoryCheck, StoryCheck, Story
 
 INVALID_ID = -1
 
@@ -18,6 +24,7 @@ class StoryTestCase(APITestCase, TempFileMixin):
     """스토리 생성, 삭제 테스트"""
 
     def setUp(self) -> None:
+        cache.clear()
         self.users = baker.make('users.User', _quantity=3)
         for user in self.users:
             baker.make('users.Profile', user=user)
@@ -70,11 +77,56 @@ class StoryTestCase(APITestCase, TempFileMixin):
         self.assertEqual(response.status_code, status.HTTP_200_OK, res)
         self.story_test(res, story)
 
-        # 다시 조회: StoryCheck 갯수 하나인지 체크
+        # 다시 조회: 읽은 유저 수 하나인지, 저장 후 StoryCheck 갯수 하나인지 체크
         response = self.client.get(f'{self.url}/{story.id}')
         res = response.data
         self.assertEqual(response.status_code, status.HTTP_200_OK, res)
-        self.assertEqual(res['read_users_count'], StoryCheck.objects.filter(user=self.user, story_id=res['id']).count())
+        self.assertEqual(res['read_users_count'], 1)
+        self.assertEqual(StoryCheck.objects.filter(user=self.user, story_id=res['id']).count(), 0)
+
+        call_command('flush_story_checks')
+        call_command('flush_counters')
+        self.assertEqual(StoryCheck.objects.filter(user=self.user, story_id=res['id']).count(), 1)
+        self.assertEqual(Story.objects.get(id=story.id).read_users_count, 1)
+
+    def test_should_requeue_abandoned_checks(self):
+        """저장 중 죽은 flush 가 꺼내 간 읽음 기록은 PROCESSING_TIMEOUT 뒤 다시 저장"""
+        story = baker.make('story.Story', owner=self.owner)
+        checks.record(self.user.id, story.id)
+        checks.take(f'{checks.PROCESSING_KEY}:dead', 100)
+
+        checks.flush()
+        self.assertFalse(StoryCheck.objects.filter(user=self.user, story=story).exists())
+
+        checks.requeue_abandoned(now=time.time() + checks.PROCESSING_TIMEOUT + 1)
+        checks.flush()
+        self.assertTrue(StoryCheck.objects.filter(user=self.user, story=story).exists())
+
+    def test_should_retrieve_cached(self):
+        """스토리 조회 캐시: DB 조회 없이, 팔로우 끊으면 조회 불가, 프로필 수정 반영"""
+        story = baker.make('story.Story', owner=self.owner)
+        self.client.force_authenticate(user=self.user)
+        self.client.get(f'{self.url}/{story.id}')
+
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.get(f'{self.url}/{story.id}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
+
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.url}/{story.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['read_users_count'], 1)
+
+        profile = self.owner.profile
+        profile.nickname = 'changed'
+        profile.save()
+        response = self.client.get(f'{self.url}/{story.id}')
+        self.assertEqual(response.data['owner']['nickname'], 'changed')
+
+        Follow.objects.get(owner=self.user, to_user=self.owner).delete()
+        response = self.client.get(f'{self.url}/{story.id}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
 
     def test_retrieve_own_story(self):
         user = self.user
@@ -102,6 +154,32 @@ class StoryTestCase(APITestCase, TempFileMixin):
         self.assertEqual(len(res), 1)
         self.assertEqual(StoryCheck.objects.filter(user_id=res[0]['id'], story=self.story).count(), 1)
 
+    @mock.patch.object(IDPagination, 'page_size', 1)
+    def test_should_list_read_users_by_viewed(self):
+        """내 스토리를 읽은 유저 리스트 - 본 시간 최신순, 저장 안 된 읽음 기록 포함, 커서 페이지"""
+        self.client.force_authenticate(user=self.user)
+        story = baker.make('story.Story', owner=self.user)
+        baker.make('story.StoryCheck', story=story, user=self.users[1], created=timezone.now() - timedelta(hours=2))
+        baker.make('story.StoryCheck', story=story, user=self.users[2], created=timezone.now() - timedelta(hours=1))
+        viewer = baker.make('users.User')
+        baker.make('users.Profile', user=viewer)
+        baker.make('relationships.Follow', owner=viewer, to_user=self.user)
+        self.client.force_authenticate(user=viewer)
+        self.client.get(f'{self.url}/{story.id}')
+
+        self.client.force_authenticate(user=self.user)
+        user_ids, url = [], f'{self.url}/{story.id}/users'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            self.assertEqual(len(response.data['results']), 1)
+            user_ids.append(response.data['results'][0]['id'])
+            url = response.data['next']
+        self.assertEqual(user_ids, [viewer.id, self.users[2].id, self.users[1].id])
+
+        response = self.client.get(f'{self.url}/{story.id}/users', {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
+
     def test_list_read_users_invalid_id(self):
         """내 스토리를 읽은 유저 리스트 - 유효하지 않은 story_id"""
         self.list_read_users_setUp()
@@ -160,6 +238,54 @@ class StoryTestCase(APITestCase, TempFileMixin):
             else:
                 self.assertFalse(watched)
 
+    def test_should_list_tray(self):
+        """스토리 트레이: 스토리가 있는 자신, 팔로우하는 유저 최신순, 다 봤는지"""
+        self.list_setUp()
+        self.client.force_authenticate(user=self.user)
+
+        def get_tray():
+            response = self.client.get(f'{self.url}/tray')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            return {item['owner']['id']: item['seen'] for item in response.data}
+
+        self.assertEqual(get_tray(), {self.user.id: False, self.owner.id: False})
+        self.client.get(f'{self.url}/{self.story.id}')
+        self.assertEqual(get_tray(), {self.user.id: False, self.owner.id: True})
+
+        # 새 스토리: 최신순 맨 앞, 안 본 상태
+        story = baker.make('story.Story', owner=self.owner)
+        response = self.client.get(f'{self.url}/tray')
+        self.assertEqual(response.data[0]['owner']['id'], self.owner.id)
+        self.assertFalse(response.data[0]['seen'])
+
+        # 삭제하면 이전 스토리 시간으로
+        story.delete()
+        self.assertEqual(get_tray(), {self.user.id: False, self.owner.id: True})
+
+        # 팔로우하면 트레이에 추가
+        baker.make('relationships.Follow', owner=self.user, to_user=self.users[2])
+        self.assertEqual(set(get_tray()), {self.user.id, self.owner.id, self.users[2].id})
+
+    def test_should_archive(self):
+        """지난 스토리 보관: 읽음 기록과 같이 옮기고 보관함에서 조회"""
+        expired = baker.make('story.Story', owner=self.user, created=self.yesterday - timedelta(seconds=1))
+        live = baker.make('story.Story', owner=self.user)
+        baker.make('story.StoryCheck', story=expired, user=self.owner)
+
+        self.assertEqual(archive.archive(), 1)
+        self.assertEqual(list(Story.objects.filter(owner=self.user).values_list('id', flat=True)), [live.id])
+        self.assertFalse(StoryCheck.objects.filter(story_id=expired.id).exists())
+        self.assertEqual(ArchivedStoryCheck.objects.filter(story_id=expired.id, user=self.owner).count(), 1)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'{self.url}/archive')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([story['id'] for story in response.data['results']], [expired.id])
+
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(f'{self.url}/archive')
+        self.assertEqual(response.data['results'], [])
+
     def story_test(self, story_res, story_obj):
         """스토리 필드 검사"""
         self.assertEqual(story_res['id'], story_obj.id)
@@ -0,0 +1,180 @@
+"""
+스토리 트레이
+
+유저별로 스토리가 있는(24시간 이내) 자신과 팔로우하는 유저 id 를 Redis sorted set 에 저장
+    story_tray:{user_id}  member: 작성자 id, score: 작성자의 최신 스토리 등록 시간(timestamp)
+    story_seen:{user_id}  field: 작성자 id, value: 본 스토리 중 가장 최신 등록 시간
+스토리를 만들면 작성자와 팔로워들의 트레이(이미 있는 키)에 추가, 삭제하면 최신 시간 갱신 또는 제거
+24시간이 지난 작성자는 읽을 때 score 로 잘라낸다
+읽기는 Redis 왕복 한 번 (키가 없을 때만 DB 에서 새로 만든다)
+"""
+from datetime import datetime, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+# 스토리가 보이는 시간
+ACTIVE_PERIOD = timedelta(days=1)
+
+# 트레이를 DB 에서 만들었다는 표시 (스토리가 하나도 없어도 키가 남도록, score 0)
+SENTINEL = 0
+
+# 이미 있는 트레이에만 작성자 추가 (더 최신일 때만 score 갱신)
+PUSH_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        local score = redis.call('ZSCORE', key, ARGV[1])
+        if not score or tonumber(score) < tonumber(ARGV[2]) then
+            redis.call('ZADD', key, ARGV[2], ARGV[1])
+        end
+    end
+end
+"""
+
+# 본 스토리 시간 저장 (더 최신일 때만)
+SEEN_SCRIPT = """
+local seen = redis.call('HGET', KEYS[1], ARGV[1])
+if not seen or tonumber(seen) < tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+"""
+
+CHUNK_SIZE = 500
+
+_scripts = {}
+
+
+def get_redis():
+    return get_redis_connection('default')
+
+
+def get_script(script):
+    if script not in _scripts:
+        _scripts[script] = get_redis().register_script(script)
+    return _scripts[script]
+
+
+def get_tray_key(user_id):
+    return f'story_tray:{user_id}'
+
+
+def get_seen_key(user_id):
+    return f'story_seen:{user_id}'
+
+
+def get_follower_ids(owner_id):
+    Follow = apps.get_model('relationships.Follow')
+    return Follow.objects.filter(to_user_id=owner_id).values_list('owner_id', flat=True).iterator()
+
+
+def get_keys(owner_id):
+    """작성자 자신과 팔로워들의 트레이 키"""
+    yield get_tray_key(owner_id)
+    for follower_id in get_follower_ids(owner_id):
+        yield get_tray_key(follower_id)
+
+
+def chunks(keys):
+    chunk = []
+    for key in keys:
+        chunk.append(key)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build(user_id):
+    """
+    DB 에서 트레이와 본 스토리 시간 새로 만들기
+    ([(작성자 id, 최신 스토리 시간)] 최신순, {작성자 id: 본 스토리 시간}) 리턴
+    """
+    Follow = apps.get_model('relationships.Follow')
+    Story = apps.get_model('story.Story')
+    StoryCheck = apps.get_model('story.StoryCheck')
+    now = timezone.now()
+    owner_ids = list(Follow.objects.filter(owner_id=user_id).values_list('to_user_id', flat=True)) + [user_id]
+    latest = Story.objects.filter(owner_id__in=owner_ids, created__gt=now - ACTIVE_PERIOD, created__lte=now). \
+        values('owner_id').annotate(latest=Max('created')).values_list('owner_id', 'latest')
+    latest = {owner_id: created.timestamp() for owner_id, created in latest}
+    seen = StoryCheck.objects.filter(user_id=user_id, story__owner_id__in=list(latest),
+                                     story__created__gt=now - ACTIVE_PERIOD). \
+        values('story__owner_id').annotate(latest=Max('story__created')).values_list('story__owner_id', 'latest')
+    seen = {owner_id: created.timestamp() for owner_id, created in seen}
+
+    tray_key, seen_key = get_tray_key(user_id), get_seen_key(user_id)
+    with get_redis().pipeline() as pipe:
+        pipe.delete(tray_key, seen_key)
+        pipe.zadd(tray_key, {SENTINEL: SENTINEL, **latest})
+        for owner_id, created in seen.items():
+            pipe.hset(seen_key, owner_id, created)
+        pipe.expire(tray_key, settings.STORY_TRAY_TIMEOUT)
+        pipe.expire(seen_key, settings.STORY_TRAY_TIMEOUT)
+        pipe.execute()
+    return sorted(latest.items(), key=lambda item: item[1], reverse=True), seen
+
+
+def read(user_id):
+    """
+    트레이 [(작성자 id, 최신 스토리 시간(datetime), 다 봤는지)] 최신순
+    지난 작성자 잘라내기, 읽기, 본 시간, 유지 시간 연장을 한 번에
+    """
+    now = timezone.now()
+    tray_key, seen_key = get_tray_key(user_id), get_seen_key(user_id)
+    with get_redis().pipeline() as pipe:
+        pipe.zremrangebyscore(tray_key, f'({SENTINEL}', (now - ACTIVE_PERIOD).timestamp())
+        pipe.zscore(tray_key, SENTINEL)
+        pipe.zrevrangebyscore(tray_key, now.timestamp(), f'({SENTINEL}', withscores=True)
+        pipe.hgetall(seen_key)
+        pipe.expire(tray_key, settings.STORY_TRAY_TIMEOUT)
+        pipe.expire(seen_key, settings.STORY_TRAY_TIMEOUT)
+        _, sentinel, members, seen, _, _ = pipe.execute()
+
+    if sentinel is None:
+        members, seen = build(user_id)
+    else:
+        members = [(int(member), score) for member, score in members]
+        seen = {int(owner_id): float(value) for owner_id, value in seen.items()}
+    return [(owner_id, datetime.fromtimestamp(score, tz=timezone.utc), seen.get(owner_id, 0) >= score)
+            for owner_id, score in members]
+
+
+def push_story(story):
+    """새 스토리 작성자를 작성자와 팔로워들의 트레이에 추가"""
+    script = get_script(PUSH_SCRIPT)
+    for keys in chunks(get_keys(story.owner_id)):
+        script(keys=keys, args=[story.owner_id, story.created.timestamp()])
+
+
+def remove_story(story):
+    """삭제된 스토리 작성자의 최신 스토리 시간 갱신, 남은 스토리가 없으면 트레이에서 제거"""
+    Story = apps.get_model('story.Story')
+    now = timezone.now()
+    latest = Story.objects.filter(owner_id=story.owner_id, created__gt=now - ACTIVE_PERIOD, created__lte=now). \
+        aggregate(latest=Max('created'))['latest']
+    redis = get_redis()
+    for keys in chunks(get_keys(story.owner_id)):
+        with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                if latest is None:
+                    pipe.zrem(key, story.owner_id)
+                else:
+                    # 트레이에 있는 작성자만 갱신
+                    pipe.zadd(key, {story.owner_id: latest.timestamp()}, xx=True)
+            pipe.execute()
+
+
+def mark_seen(user_id, owner_id, created):
+    """user 가 owner 의 created 에 등록된 스토리를 봤음"""
+    get_script(SEEN_SCRIPT)(keys=[get_seen_key(user_id)],
+                            args=[owner_id, created.timestamp(), settings.STORY_TRAY_TIMEOUT])
+
+
+def delete(user_id):
+    """팔로우가 바뀌면 트레이 새로 만들도록"""
+    get_redis().delete(get_tray_key(user_id), get_seen_key(user_id))
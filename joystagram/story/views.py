@@ -1,19 +1,21 @@
 from datetime import timedelta
 from time import sleep
 
-from django.core.cache import cache
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework import viewsets, status, mixins
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import GenericViewSet
 
 from core.permissions import IsOwnerOrAuthenticatedReadOnly
 from relationships.models import Follow
-from story.models import Story, StoryCheck
-from story.serializers import StorySerializer, StoryListSerializer
+from story import caches, checks, trays
+from story.models import ArchivedStory, Story
+from story.serializers import StorySerializer, StoryListSerializer, StoryTraySerializer, ArchivedStorySerializer
 from users.models import User
 from users.serializers import SimpleProfileSerializer
 
@@ -24,33 +26,53 @@ class StoryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsOwnerOrAuthenticatedReadOnly]
 
     def retrieve(self, request, *args, **kwargs):
-
-        # 캐시 검사
-        key = f'{kwargs["pk"]}story'
-        instance = cache.get(key)
-        if not instance:
+        """
+        직렬화된 스토리 캐시(story.caches), hit 이면 조회 권한만 팔로우 여부 캐시로 검사 (DB 조회 없음)
+        읽음 기록 (StoryCheck 는 flush_story_checks 가 저장), 트레이에 본 시간 기록
+        """
+        payload = caches.get_payload(kwargs['pk'])
+        if payload is None:
             instance = self.get_object()
-            cache.set(key, instance, 60)
-
-        self.check_object_permissions(request, instance)
-        serializer = self.get_serializer(instance)
-        response = Response(serializer.data)
-
-        # 조회 성공 시 StoryCheck get_or_create
-        if (response.status_code == status.HTTP_200_OK) and (request.user.id != response.data['owner']['id']):
-            StoryCheck.objects.get_or_create(user=request.user, story_id=response.data.get('id'))
-        return response
+            payload = caches.set_payload(instance, self.get_serializer(instance).data)
+        elif not caches.can_view(request.user.id, payload):
+            raise NotFound()
+
+        story_id, owner_id = payload['data']['id'], payload['owner_id']
+        if request.user.id != owner_id:
+            checks.record(request.user.id, story_id)
+        trays.mark_seen(request.user.id, owner_id, payload['created'])
+        return Response({**payload['data'], 'read_users_count': checks.count(story_id)})
+
+    @action(detail=False)
+    def tray(self, request, *args, **kwargs):
+        """
+        자신과 팔로우하는 유저 중 스토리가 있는 유저, 최신 스토리 순 (Redis 트레이)
+        GET /api/story/tray
+        """
+        tray = trays.read(request.user.id)
+        users = User.objects.select_related('profile').in_bulk([owner_id for owner_id, latest, seen in tray])
+        data = [{'owner': users[owner_id], 'latest': latest, 'seen': seen}
+                for owner_id, latest, seen in tray if owner_id in users]
+        return Response(self.get_serializer(data, many=True).data)
+
+    @action(detail=False)
+    def archive(self, request, *args, **kwargs):
+        """
+        자신의 보관된(24시간이 지난) 스토리, 최신순
+        GET /api/story/archive
+        """
+        page = self.paginate_queryset(ArchivedStory.objects.filter(owner=request.user))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
 
     def get_serializer_class(self):
         if self.action == 'list':
             return StoryListSerializer
+        if self.action == 'tray':
+            return StoryTraySerializer
+        if self.action == 'archive':
+            return ArchivedStorySerializer
         return super().get_serializer_class()
 
-    def get_queryset(self):
-        if self.action == 'retrieve':
-            return super().get_queryset().prefetch_related('story_checks')
-        return super().get_queryset()
-
     def filter_queryset(self, qs):
         """
         자신 or 자신이 팔로우하는 유저의 스토리 중
@@ -64,19 +86,13 @@ class StoryViewSet(viewsets.ModelViewSet):
             Q(owner_id__in=Follow.objects.filter(owner=self.request.user).values('to_user_id')) |
             Q(owner=self.request.user)
         ).select_related('owner__profile')
-
-        if self.action == 'retrieve':
-            return qs.prefetch_related('story_checks')
         return qs
 
     def paginate_queryset(self, queryset):
         # is_watched(bool) 주입
         page = super().paginate_queryset(queryset)
-        if self.request.user.is_authenticated:
-            story_check_qs = StoryCheck.objects.filter(user=self.request.user, story__in=page)
-            self.story_check_dict = {
-                story_check.story_id: (story_check.id is not None) for story_check in story_check_qs
-            }
+        if self.request.user.is_authenticated and self.action == 'list':
+            self.story_check_dict = checks.get_viewed(self.request.user.id, [story.id for story in page])
         return page
 
     def perform_create(self, serializer):
@@ -85,12 +101,14 @@ class StoryViewSet(viewsets.ModelViewSet):
 
 class StoryReadUserViewSet(mixins.ListModelMixin, GenericViewSet):
     """
-    자신의 스토리를 본 유저 리스트
-    /api/story/{story_id}/users
+    자신의 스토리를 본 유저 리스트, 본 시간 최신순
+    /api/story/{story_id}/users?cursor=
+    StoryCheck JOIN 없이 스토리별 Redis sorted set(story.checks)에서 id 를 읽고 유저만 조회
     """
     queryset = User.objects.all()
     serializer_class = SimpleProfileSerializer
     permission_classes = [IsOwnerOrAuthenticatedReadOnly]
+    cursor_query_param = 'cursor'
 
     def list(self, request, *args, **kwargs):
         story_pk = self.kwargs.get('story_pk')
@@ -99,9 +117,24 @@ class StoryReadUserViewSet(mixins.ListModelMixin, GenericViewSet):
         story = get_object_or_404(Story, id=story_pk)
         if story.owner_id != request.user.id:
             raise PermissionDenied()
-        return super().list(request, *args, **kwargs)
 
-    def filter_queryset(self, queryset):
-        return super().filter_queryset(queryset). \
-            filter(storycheck__story=self.kwargs.get('story_pk')). \
-            select_related('profile')
+        cursor = request.query_params.get(self.cursor_query_param)
+        after = checks.decode_cursor(cursor) if cursor else None
+        page = checks.read_viewers(story.id, after, self.paginator.get_page_size(request))
+        if page is None:
+            raise NotFound('Invalid cursor')
+        viewers, has_next = page
+
+        # 본 시간 순서 유지, 그 사이 탈퇴한 유저는 제외
+        users = User.objects.select_related('profile').in_bulk([user_id for user_id, _ in viewers])
+        users = [users[user_id] for user_id, _ in viewers if user_id in users]
+
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), self.cursor_query_param,
+                                           checks.encode_cursor(viewers[-1][0]))
+        return Response({
+            'next': next_url,
+            'previous': None,
+            'results': self.get_serializer(users, many=True).data,
+        })
@@ -9,6 +9,7 @@ from .models import User, Profile
 
 class ProfileInline(admin.TabularInline):
     model = Profile
+    readonly_fields = ['img_width', 'img_height', 'img_size', 'img_placeholder']
 
 
 @admin.register(User)
@@ -34,12 +35,13 @@ class UserAdmin(DjangoUserAdmin):
     search_fields = ('email', 'profile__nickname')
     ordering = ('email',)
     inlines = [ProfileInline]
+    list_select_related = ['profile']
 
     def nickname(self, user):
         return user.profile.nickname
 
     def posts_count(self, user):
-        return user.posts.count()
+        return user.profile.posts_count
 
     def comments_count(self, user):
         return user.comments.count()
@@ -48,7 +50,7 @@ class UserAdmin(DjangoUserAdmin):
         return user.recomments.count()
 
     def followers_count(self, user):
-        return user.followers.count()
+        return user.profile.followers_count
 
     def followings_count(self, user):
-        return user.followings.count()
+        return user.profile.followings_count
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2020-08-05 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20200804_0732'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.0.7 on 2020-08-07 02:25
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_posts_count'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # nickname__icontains, nickname__istartswith 는 UPPER(nickname) LIKE 로 검색하므로 UPPER(nickname) 에 trigram 인덱스
+        migrations.RunSQL(
+            'CREATE INDEX users_profile_nickname_upper_trgm ON users_profile '
+            'USING gin (UPPER(nickname::text) gin_trgm_ops);',
+            'DROP INDEX IF EXISTS users_profile_nickname_upper_trgm;',
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-followers_count'], name='profile_followers_idx'),
+        ),
+    ]
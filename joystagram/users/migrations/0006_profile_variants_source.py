@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2020-08-10 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_profile_nickname_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='variants_source',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
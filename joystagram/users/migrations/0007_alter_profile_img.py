@@ -0,0 +1,19 @@
+# Generated by Django 3.0.7 on 2020-08-11 04:12
+
+import core.media
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_profile_variants_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='img',
+            field=core.media.ContentHashImageField(upload_to='profile_img'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.7 on 2020-08-12 02:45
+
+import core.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_profile_img'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='img_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='img_placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='img_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='img_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='img',
+            field=core.media.ContentHashImageField(height_field='img_height', size_field='img_size', upload_to='profile_img', width_field='img_width'),
+        ),
+    ]
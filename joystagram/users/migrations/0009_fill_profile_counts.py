@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, lookup):
+    counts = model.objects.filter(**{lookup: OuterRef('user_id')}).order_by().values(lookup). \
+        annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def fill_profile_counts(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('relationships', 'Follow')
+    Profile.objects.update(
+        posts_count=count_of(Post, 'owner'),
+        followers_count=count_of(Follow, 'to_user'),
+        followings_count=count_of(Follow, 'owner'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_profile_img_meta'),
+        ('posts', '0018_photo_img_meta'),
+        ('relationships', '0003_auto_20200728_0325'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_profile_counts, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,14 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 from django_lifecycle import hook, BEFORE_UPDATE, BEFORE_SAVE
 from model_utils.models import TimeStampedModel
+from rest_framework.authtoken.models import Token
+
+from core import images, media
+from core.authentications import invalidate_token
 
 
 class UserManager(BaseUserManager):
@@ -17,7 +21,8 @@ class UserManager(BaseUserManager):
         if not email:
             raise ValueError('The given email must be set')
         email = self.normalize_email(email)
-        user = self.model(email=email, password=password, **extra_fields)
+        user = self.model(email=email, **extra_fields)
+        user.set_password(password)
         user.save()
         return user
 
@@ -50,11 +55,22 @@ class User(AbstractUser):
 
     objects = UserManager()
 
-    def save(self, *args, **kwargs):
-        self.set_password(self.password)
-        super().save(*args, **kwargs)
 
+@receiver(post_save, sender=User)
+def invalidate_user_token(sender, instance, created, **kwargs):
+    """비밀번호 변경, 비활성화 등 유저 변경 시 토큰 캐시 삭제"""
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            invalidate_token(key)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """로그아웃(토큰 삭제) 시 토큰 캐시 삭제"""
+    invalidate_token(instance.key)
 
+
+# 이전 마이그레이션에서 참조
 def profile_img_path(instance, filename):
     return f'profile_img/{instance.user_id}/{filename}'
 
@@ -64,6 +80,29 @@ class Profile(TimeStampedModel):
     user = models.OneToOneField('users.User', on_delete=models.CASCADE)
     nickname = models.CharField(max_length=20)
     introduce = models.CharField(max_length=255)
-    img = models.ImageField(upload_to=profile_img_path)
+    img = media.ContentHashImageField(upload_to='profile_img', width_field='img_width', height_field='img_height',
+                                      size_field='img_size')
+    img_width = models.PositiveIntegerField(null=True, blank=True)
+    img_height = models.PositiveIntegerField(null=True, blank=True)
+    img_size = models.PositiveIntegerField(null=True, blank=True)
+    # 흐린 미리보기 data URI (core.images)
+    img_placeholder = models.TextField(blank=True, default='')
+    # 변형 이미지(core.images)를 만든 원본 이름
+    variants_source = models.CharField(max_length=100, blank=True, default='')
+    posts_count = models.PositiveIntegerField(default=0)
     followers_count = models.PositiveIntegerField(default=0)
     followings_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # 닉네임 자동완성 팔로워 순 정렬
+        indexes = [models.Index(fields=['-followers_count'], name='profile_followers_idx')]
+
+
+# 변형 이미지 생성(generate_variants) 전에 파일 참조(MediaFile row) 먼저
+media.track(Profile)
+
+
+@receiver(post_save, sender=Profile)
+def generate_profile_img_variants(sender, instance, **kwargs):
+    """프로필 사진 변형 이미지 생성"""
+    images.generate_variants([instance])
@@ -0,0 +1,76 @@
+"""
+비밀번호 해싱 (회원가입, 로그인, 비밀번호 변경)
+
+User.save 는 해싱하지 않으므로 비밀번호는 여기를 거쳐서 저장
+PASSWORD_HASHER_WORKERS 가 0 보다 크면 해싱만 크기가 정해진 스레드 풀에서 실행 (DB 조회, 저장은 요청 스레드)
+풀과 대기열이 가득 차면 기다리지 않고 Throttled(429)
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import Throttled
+
+from users.models import User
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASHER_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+            _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHER_QUEUE_SIZE)
+    return _executor, _slots
+
+
+def run(func, *args):
+    """func 를 해싱 풀에서 실행하고 결과 리턴 (workers 가 0 이면 바로 실행)"""
+    if settings.PASSWORD_HASHER_WORKERS <= 0:
+        return func(*args)
+
+    executor, slots = get_executor()
+    if not slots.acquire(blocking=False):
+        raise Throttled(detail='Too many password requests.')
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def make_password(raw_password):
+    return run(hashers.make_password, raw_password)
+
+
+def set_password(user, raw_password):
+    """비밀번호 해싱 후 password 만 저장"""
+    user.password = make_password(raw_password)
+    user.save(update_fields=['password'])
+
+
+def check_password(user, raw_password):
+    """비밀번호 확인, 해시 알고리즘이 바뀌었으면 새 해시로 저장"""
+    upgraded = []
+    valid = run(hashers.check_password, raw_password, user.password,
+                lambda raw: upgraded.append(hashers.make_password(raw)))
+    if valid and upgraded:
+        user.password = upgraded[0]
+        user.save(update_fields=['password'])
+    return valid
+
+
+def authenticate(email, password):
+    """ModelBackend.authenticate 와 같은 동작 (해싱만 풀에서)"""
+    user = User.objects.filter(email=email).first() if email else None
+    if user is None:
+        # 없는 유저도 해싱 시간만큼 걸리도록 (유저 존재 여부 타이밍 노출 방지)
+        make_password(password)
+        return None
+    if check_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,26 @@
+"""
+닉네임 자동완성
+
+닉네임이 검색어로 시작하는 프로필을 팔로워 수 순으로 (UPPER(nickname) trigram 인덱스, 팔로워 수 인덱스)
+많이 검색되는 접두어는 프로세스 로컬 LRU 에 결과를 잠깐 저장
+"""
+from django.conf import settings
+
+from core.caches import LRUCache
+from users.models import Profile
+
+AUTOCOMPLETE_FIELDS = ('user_id', 'nickname', 'img', 'variants_source', 'img_width', 'img_height', 'img_size',
+                       'img_placeholder', 'followers_count')
+
+prefix_cache = LRUCache(settings.USER_AUTOCOMPLETE_CACHE_SIZE, settings.USER_AUTOCOMPLETE_CACHE_TIMEOUT)
+
+
+def autocomplete(prefix, limit=10):
+    """[Profile] (AUTOCOMPLETE_FIELDS 만 채운 객체)"""
+    cache_key = (prefix.lower(), limit)
+    rows = prefix_cache.get(cache_key)
+    if rows is None:
+        rows = list(Profile.objects.filter(nickname__istartswith=prefix).
+                    order_by('-followers_count', 'user_id').values_list(*AUTOCOMPLETE_FIELDS)[:limit])
+        prefix_cache.set(cache_key, rows)
+    return [Profile(**dict(zip(AUTOCOMPLETE_FIELDS, row))) for row in rows]
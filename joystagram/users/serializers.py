@@ -1,6 +1,9 @@
-from django.contrib.auth import authenticate
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
+
+from core.images import ImageMetaField, ImageVariantsField
+from relationships import caches
+from users import passwords
 from .models import User, Profile
 
 
@@ -9,26 +12,40 @@ class SimpleProfileSerializer(ModelSerializer):
     nickname = serializers.CharField(max_length=20, source='profile.nickname')
     introduce = serializers.CharField(default='', source='profile.introduce')
     img = serializers.ImageField(read_only=True, source='profile.img')
+    img_variants = ImageVariantsField(source='profile')
+    img_meta = ImageMetaField(source='profile')
 
     class Meta:
         model = User
-        fields = ('id', 'nickname', 'introduce', 'img')
+        fields = ('id', 'nickname', 'introduce', 'img', 'img_variants', 'img_meta')
+
+
+class ProfileAutocompleteSerializer(ModelSerializer):
+    """닉네임 자동완성 시리얼라이저"""
+    id = serializers.IntegerField(source='user_id')
+    img_variants = ImageVariantsField()
+    img_meta = ImageMetaField()
+
+    class Meta:
+        model = Profile
+        fields = ('id', 'nickname', 'img', 'img_variants', 'img_meta', 'followers_count')
 
 
 class UserSerializer(ModelSerializer):
     nickname = serializers.CharField(max_length=20, source='profile.nickname')
     introduce = serializers.CharField(default='', source='profile.introduce')
     img = serializers.ImageField(read_only=True, source='profile.img')
+    img_variants = ImageVariantsField(source='profile')
+    img_meta = ImageMetaField(source='profile')
 
-    # 쿼리 4개씩??
-    follow_id = serializers.SerializerMethodField(read_only=True)  # todo 이건 진짜 모르겠다
-    posts_count = serializers.IntegerField(read_only=True, source='posts.count')
-    followings_count = serializers.IntegerField(read_only=True, source='followings.count')
-    followers_count = serializers.IntegerField(read_only=True, source='followers.count')
+    follow_id = serializers.SerializerMethodField(read_only=True)
+    posts_count = serializers.IntegerField(read_only=True, source='profile.posts_count')
+    followings_count = serializers.IntegerField(read_only=True, source='profile.followings_count')
+    followers_count = serializers.IntegerField(read_only=True, source='profile.followers_count')
 
     class Meta:
         model = User
-        fields = ('id', 'email', 'password', 'nickname', 'introduce', 'img', 'follow_id',
+        fields = ('id', 'email', 'password', 'nickname', 'introduce', 'img', 'img_variants', 'img_meta', 'follow_id',
                   'posts_count', 'followings_count', 'followers_count')
         extra_kwargs = {'password': {'write_only': True}}
 
@@ -36,6 +53,7 @@ class UserSerializer(ModelSerializer):
         """유저 생성 시 프로필도 같이 생성"""
         # todo 트랜잭션?
         profile = validated_data.pop('profile')
+        validated_data['password'] = passwords.make_password(validated_data['password'])
         user = User.objects.create(**validated_data)
         Profile.objects.create(user=user, **profile)
         return user
@@ -49,10 +67,7 @@ class UserSerializer(ModelSerializer):
     def get_follow_id(self, to_user):
         user = self.context['request'].user
         if user.is_authenticated:
-            try:
-                return to_user.followers.get(owner=user).id
-            except:
-                pass
+            return caches.get_follow_ids(user.id, [to_user.id]).get(to_user.id)
         return None
 
 
@@ -63,8 +78,7 @@ class UserPasswordSerializer(ModelSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
     def update(self, instance, validated_data):
-        instance.password = validated_data['password']
-        instance.save()
+        passwords.set_password(instance, validated_data['password'])
         return instance
 
 
@@ -84,8 +98,7 @@ class LoginSerializer(serializers.Serializer):
             msg = 'Must include "username" and "password".'
             raise serializers.ValidationError(msg, code='authorization')
 
-        user = authenticate(request=self.context.get('request'),
-                            email=email, password=password)
+        user = passwords.authenticate(email=email, password=password)
         if user is None:
             msg = 'Unable to log in with provided credentials.'
             raise serializers.ValidationError(msg, code='authorization')
@@ -1,9 +1,14 @@
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from .models import User
+from users.search import prefix_cache
+from .models import User, Profile
 
 email = 'email@test.com'
 password = '1234'
@@ -50,7 +55,8 @@ class UserLoginTestCase(APITestCase):
     url = '/api/users/login'
 
     def setUp(self) -> None:
-        self.user = baker.make(User, email=email, password=password)  # baker로 만들면 로그인 안됨..why
+        # User.save 는 해싱하지 않으므로 해싱된 비밀번호로 생성
+        self.user = baker.make(User, email=email, password=make_password(password))
 
     def test_with_correct_info(self):
         response = self.client.post(self.url, {'email': email, 'password': password})
@@ -127,6 +133,48 @@ class UserRetrieveTestCase(APITestCase):
         self.assertTrue('introduce' in res)
         self.assertTrue('img' in res)
 
+    def test_should_retrieve_counts(self):
+        """게시글, 팔로워, 팔로잉 갯수"""
+        baker.make('users.Profile', user=self.user)
+        baker.make('posts.Post', owner=self.user, _quantity=2)
+        baker.make('relationships.Follow', to_user=self.user, _quantity=3)
+        baker.make('relationships.Follow', owner=self.user)
+        self.client.force_authenticate(user=self.user, token=self.token.key)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['posts_count'], 2)
+        self.assertEqual(response.data['followers_count'], 3)
+        self.assertEqual(response.data['followings_count'], 1)
+
+    def test_should_retrieve_bounded_queries(self):
+        """게시글, 팔로우가 많아도 쿼리 수 고정, 게시글, 팔로우 목록은 읽지 않음"""
+        baker.make('users.Profile', user=self.user)
+        viewer = baker.make('users.User')
+        baker.make('users.Profile', user=viewer)
+        self.client.force_authenticate(user=viewer)
+
+        small_queries = self.capture_retrieve_queries()
+
+        baker.make('posts.Post', owner=self.user, _quantity=30)
+        baker.make('relationships.Follow', to_user=self.user, _quantity=30)
+        baker.make('relationships.Follow', owner=self.user, _quantity=30)
+        baker.make('relationships.Follow', owner=viewer, to_user=self.user)
+        large_queries = self.capture_retrieve_queries()
+
+        self.assertEqual(len(small_queries), len(large_queries), large_queries)
+        for sql in large_queries:
+            self.assertNotIn('posts_post', sql)
+        follow_queries = [sql for sql in large_queries if 'relationships_follow' in sql]
+        self.assertLessEqual(len(follow_queries), 1, follow_queries)
+
+    def capture_retrieve_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in context.captured_queries]
+
     def test_should_denied_retrieve(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -150,6 +198,23 @@ class UserListTestCase(APITestCase):
             self.assertTrue('img' in user_res)
             self.assertTrue(search_nick in user_res['nickname'])
 
+    def test_should_autocomplete_user(self):
+        """닉네임 자동완성 (팔로워 수 순)"""
+        prefix_cache.clear()
+        for i, profile in enumerate(Profile.objects.order_by('id')):
+            Profile.objects.filter(id=profile.id).update(followers_count=i)
+        baker.make('users.profile', nickname='other')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/users/autocomplete?nickname=USER&limit=3')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([user_res['nickname'] for user_res in response.data], ['user4', 'user3', 'user2'])
+        self.assertEqual([user_res['followers_count'] for user_res in response.data], [4, 3, 2])
+
+        response = self.client.get('/api/users/autocomplete?nickname=USER&limit=-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
 
 class UserUpdateTestCase(APITestCase):
 
@@ -176,6 +241,18 @@ class UserUpdateTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('token' in response.data)
 
+    def test_should_not_rehash_on_save(self):
+        """비밀번호 외 수정 시 비밀번호 해시 유지"""
+        self.client.force_authenticate(user=self.user)
+        self.client.patch(self.password_url, data=self.data)
+        user = User.objects.get(id=self.user.id)
+        hashed = user.password
+
+        user.first_name = 'first_name'
+        user.save()
+        self.assertEqual(User.objects.get(id=self.user.id).password, hashed)
+        self.assertTrue(user.check_password('1111'))
+
     def test_should_denied_update_password(self):
         """비밀번호 수정-권한 없음"""
         response = self.client.patch(self.password_url, data=self.data)
@@ -12,11 +12,13 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from core.permissions import IsUserSelf
+from relationships import caches
 from relationships.models import Follow
 from relationships.serializers import UserListSerializer
 from story.models import StoryCheck, Story
+from users import search
 from users.models import User
-from users.serializers import UserSerializer, LoginSerializer, UserPasswordSerializer
+from users.serializers import UserSerializer, LoginSerializer, UserPasswordSerializer, ProfileAutocompleteSerializer
 
 
 
@@ -28,11 +30,9 @@ class UserViewSet(ModelViewSet):
     authentication_classes = []  # todo
 
     def filter_queryset(self, qs):
-        User.objects.prefetch_related('to')
         if self.action == 'retrieve':
-            return qs.select_related('profile').prefetch_related('posts', 'followers__owner', 'followings__to_user')
-            # return super().filter_queryset(qs).\
-            #     select_related('profile').prefetch_related('posts', 'followers__owner', 'followings__to_user_id')
+            # 게시글, 팔로우 갯수는 Profile 에 저장된 값
+            return qs.select_related('profile')
         if self.action == 'followers':
             qs = qs.filter(
                 id__in=Follow.objects.filter(to_user_id=self.kwargs['pk']).values('owner_id')
@@ -52,11 +52,10 @@ class UserViewSet(ModelViewSet):
     def paginate_queryset(self, queryset):
         page = super().paginate_queryset(queryset)
 
-        # like_id 주입
+        # follow_id 주입 (페이지에 나온 유저들만)
         if self.request.user.is_authenticated:
             if self.action in ('list', 'followers', 'followings'):
-                follow_list = Follow.objects.filter(owner=self.request.user)
-                self.follow_id_dict = {follow.to_user_id: follow.id for follow in follow_list}
+                self.follow_id_dict = caches.get_follow_ids(self.request.user.id, [user.id for user in page])
         return page
 
     def get_permissions(self):
@@ -113,6 +112,22 @@ class UserViewSet(ModelViewSet):
         """
         return super().list(request, *args, **kwargs)
 
+    @action(detail=False)
+    def autocomplete(self, request, *args, **kwargs):
+        """
+        닉네임이 검색어로 시작하는 유저를 팔로워 수 순으로
+        GET /api/users/autocomplete?nickname=
+        """
+        nickname = request.query_params.get('nickname')
+        if not nickname:
+            raise ParseError('query parameter required: nickname not supplied')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            raise ParseError('query parameter limit must be an integer')
+        profiles = search.autocomplete(nickname, limit)
+        return Response(ProfileAutocompleteSerializer(profiles, many=True, context={'request': request}).data)
+
     @action(detail=False)
     def locust_test(self, request, *args, **kwargs):
         logger = logging.getLogger(__name__)